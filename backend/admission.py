@@ -0,0 +1,99 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Raised when both the in-flight slots and the wait queue are full."""
+
+    def __init__(self, retry_after):
+        super().__init__("Server is over capacity")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passed before its inference ran."""
+
+
+def check_deadline(deadline):
+    """Raise DeadlineExceeded if the monotonic deadline (None = no deadline) has passed."""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded("Request deadline passed before inference")
+
+
+class AdmissionController:
+    """Bounded concurrency for one worker: max_in_flight requests run, max_queue wait.
+
+    A request that finds the queue full is rejected at once (Overloaded) instead of
+    piling up behind work it will time out on; one that waits past its deadline, or
+    whose deadline passes before inference (check_deadline), is dropped as expired.
+    Retry-After hints come from the current queue length and a moving average of
+    how long admitted requests hold a slot.
+    """
+
+    def __init__(self, max_in_flight=4, max_queue=8):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._queued = 0
+        self._served = 0
+        self._shed = 0
+        self._expired = 0
+        self._avg_service = 0.1
+
+    def retry_after(self):
+        """Seconds until a slot is likely free for a new request (at least 1)."""
+        waiting = (self._queued + 1) * self._avg_service / max(self.max_in_flight, 1)
+        return max(1, math.ceil(waiting))
+
+    @contextmanager
+    def slot(self, deadline=None):
+        with self._cond:
+            if self._in_flight >= self.max_in_flight:
+                if self._queued >= self.max_queue:
+                    self._shed += 1
+                    raise Overloaded(self.retry_after())
+                self._queued += 1
+                try:
+                    while self._in_flight >= self.max_in_flight:
+                        remaining = deadline - time.monotonic() if deadline is not None else None
+                        if remaining is not None and remaining <= 0:
+                            self._expired += 1
+                            raise DeadlineExceeded("Request deadline passed while queued")
+                        self._cond.wait(remaining)
+                finally:
+                    self._queued -= 1
+            self._in_flight += 1
+
+        started = time.monotonic()
+        expired = False
+        try:
+            yield
+        except DeadlineExceeded:
+            expired = True
+            raise
+        finally:
+            held = time.monotonic() - started
+            with self._cond:
+                self._in_flight -= 1
+                if expired:
+                    self._expired += 1
+                else:
+                    self._served += 1
+                    self._avg_service = 0.9 * self._avg_service + 0.1 * held
+                self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "served": self._served,
+                "shed": self._shed,
+                "expired": self._expired,
+                "avg_service_ms": round(self._avg_service * 1000, 2),
+            }
@@ -1,118 +1,784 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
-from tensorflow.keras.models import load_model
-from PIL import Image
 import numpy as np
+import hmac
 import io
 import os
 import urllib.request
 import random
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+
+try:
+    import msgpack
+except ImportError:  # optional: responses fall back to JSON
+    msgpack = None
+
+from admission import AdmissionController, DeadlineExceeded, Overloaded, check_deadline
+from batcher import MicroBatcher
+from prediction_cache import PredictionCache, model_version_for
+from phash_cache import PerceptualHashIndex, perceptual_hash
+from preprocessing import RAW_INPUT_BYTES, decode_image, from_raw_tensor, to_model_input
+from metrics import registry as metrics, request_seconds, stage
+from profiling import SamplingProfiler
+from model_registry import ModelRegistry
+from model_runtime import ModelRuntime
+from tuning import apply_tuning
 
 app = Flask(__name__)
 CORS(app)
 
-# Load YOUR local trained model
-try:
-    model_path = "../ml_model/waste_classifier_model.h5"
-    
-    if os.path.exists(model_path):
-        print(f"Loading YOUR trained model from: {model_path}")
-        model = load_model(model_path)
-        print("YOUR trained model loaded successfully!")
-        print(f"Model input shape: {model.input_shape}")
-        print(f"Model output shape: {model.output_shape}")
-    else:
+# Paths resolve relative to this file, so the app works from any working directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Settings autotune.py chose for this host (tuning.json); explicit environment variables win
+apply_tuning()
+
+# Which runtime serves the model: "keras" (full TensorFlow, the .h5 file),
+# "tflite" (a float16/int8 artifact from convert_tflite.py run by the LiteRT interpreter)
+# or "shared" (weights exported by shared_weights.py, memory-mapped so all workers
+# on a host share one copy of the big Dense layers)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+MODEL_PATH = os.environ.get('MODEL_PATH', os.path.join(BASE_DIR, '..', 'ml_model', 'waste_classifier_model.h5'))
+TFLITE_MODEL_PATH = os.environ.get('TFLITE_MODEL_PATH', os.path.join(BASE_DIR, '..', 'ml_model', 'waste_classifier_model_int8.tflite'))
+SHARED_WEIGHTS_DIR = os.environ.get('SHARED_WEIGHTS_DIR', os.path.join(BASE_DIR, '..', 'ml_model', 'shared_weights'))
+TFLITE_NUM_THREADS = int(os.environ['TFLITE_NUM_THREADS']) if os.environ.get('TFLITE_NUM_THREADS') else None
+# TensorFlow's thread pools per worker (0 = TensorFlow's default of one thread per core).
+# With several gunicorn workers the defaults oversubscribe the CPU; see autotune.py.
+TF_INTRA_OP_THREADS = int(os.environ.get('TF_INTRA_OP_THREADS', 0))
+TF_INTER_OP_THREADS = int(os.environ.get('TF_INTER_OP_THREADS', 0))
+
+# Cascade mode: a small fast model (e.g. the distilled waste_classifier_model_tiny.h5
+# or a .tflite) answers first and only images it scores within CASCADE_BAND of 0.5
+# go to the full model. Pick the band with `python cascade.py`.
+CASCADE_MODEL_PATH = os.environ.get('CASCADE_MODEL_PATH')
+CASCADE_BAND = float(os.environ.get('CASCADE_BAND', 0.25))
+# Share of confident fast-model answers re-checked against the full model (live agreement)
+CASCADE_AUDIT_RATE = float(os.environ.get('CASCADE_AUDIT_RATE', 0.01))
+
+# Batch shapes run once before the worker reports ready, e.g. "1,16" when
+# micro-batching so neither shape pays tracing cost on a real request
+WARMUP_BATCH_SIZES = [int(s) for s in os.environ.get('WARMUP_BATCH_SIZES', '1').split(',') if s.strip()]
+# Set to 0 to load synchronously at import (e.g. for scripts that need the model right away)
+MODEL_LOAD_BACKGROUND = os.environ.get('MODEL_LOAD_BACKGROUND', '1') == '1'
+
+# Versioned models (model_registry.py): when set, the CURRENT version in this
+# directory is served instead of MODEL_PATH / INFERENCE_BACKEND. Every
+# MODEL_WATCH_INTERVAL seconds each worker checks CURRENT (or, without a
+# registry, MODEL_PATH's size and mtime; off by default) and hot-swaps to a new
+# version in the background. POST /admin/model/reload does it on demand.
+MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR')
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 5 if MODEL_REGISTRY_DIR else 0))
+
+model_path = {'tflite': TFLITE_MODEL_PATH, 'shared': SHARED_WEIGHTS_DIR}.get(INFERENCE_BACKEND, MODEL_PATH)
+registry = ModelRegistry(MODEL_REGISTRY_DIR) if MODEL_REGISTRY_DIR else None
+
+def wanted_version():
+    """The version this worker should be serving: CURRENT in the registry, else MODEL_PATH's version tag."""
+    if registry is not None:
+        return registry.current()
+    return model_version_for(model_path)
+
+def configure_tensorflow_threads():
+    """Import TensorFlow and size its thread pools from TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS.
+    
+    TensorFlow only accepts this before it runs its first op, so a hot swap keeps
+    the values set at startup.
+    """
+    import tensorflow as tf
+    try:
+        if TF_INTRA_OP_THREADS:
+            tf.config.threading.set_intra_op_parallelism_threads(TF_INTRA_OP_THREADS)
+        if TF_INTER_OP_THREADS:
+            tf.config.threading.set_inter_op_parallelism_threads(TF_INTER_OP_THREADS)
+    except RuntimeError:
+        pass
+
+def load_serving_model(runtime, version):
+    """Load YOUR local trained model; TensorFlow is only imported here, off the import path."""
+    if registry is not None:
+        if version is None:
+            raise FileNotFoundError(f"No model versions published in {MODEL_REGISTRY_DIR}")
+        from model_files import load_model_file
+        path = registry.artifact(version)
+        print(f"Loading model version {version} from: {path}")
+        if not path.endswith('.tflite'):
+            with runtime.phase('import_tensorflow'):
+                configure_tensorflow_threads()
+        with runtime.phase('read_weights'):
+            model = load_model_file(path, num_threads=TFLITE_NUM_THREADS)
+        return wrap_cascade(runtime, model, version)
+    
+    if not os.path.exists(model_path):
         print(f"Model not found at: {model_path}")
         raise FileNotFoundError(f"Model file not found: {model_path}")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    print("Using fallback classification.")
-    model = None
+    
+    print(f"Loading YOUR trained model from: {model_path} ({INFERENCE_BACKEND})")
+    if INFERENCE_BACKEND == 'tflite':
+        from tflite_model import TFLiteModel
+        model = TFLiteModel(model_path, num_threads=TFLITE_NUM_THREADS)
+    elif INFERENCE_BACKEND == 'shared':
+        with runtime.phase('import_tensorflow'):
+            from shared_weights import SharedWeightsModel
+            configure_tensorflow_threads()
+        with runtime.phase('read_weights'):
+            model = SharedWeightsModel(model_path)
+    elif model_path.endswith('.npz'):
+        # Pruned + clustered model from prune_model.py
+        with runtime.phase('import_tensorflow'):
+            from compressed_model import load_compressed_model
+            configure_tensorflow_threads()
+        with runtime.phase('read_weights'):
+            model = load_compressed_model(model_path)
+    else:
+        with runtime.phase('import_tensorflow'):
+            configure_tensorflow_threads()
+            from tensorflow.keras.models import load_model
+        with runtime.phase('read_weights'):
+            model = load_model(model_path)
+    return wrap_cascade(runtime, model, version)
+
+def wrap_cascade(runtime, model, version):
+    if CASCADE_MODEL_PATH:
+        from cascade import ModelCascade
+        from model_files import load_model_file
+        with runtime.phase('read_cascade_model'):
+            # Tag the version with the cascade file actually loaded; it may change between swaps
+            loaded_cascade_tags[version] = f"+cascade:{model_version_for(CASCADE_MODEL_PATH)}@{CASCADE_BAND}"
+            fast_model = load_model_file(CASCADE_MODEL_PATH, num_threads=TFLITE_NUM_THREADS)
+        model = ModelCascade(fast_model, model, band=CASCADE_BAND, audit_rate=CASCADE_AUDIT_RATE)
+        print(f"Cascade enabled: {CASCADE_MODEL_PATH} first, full model when within {CASCADE_BAND} of 0.5")
+    print("YOUR trained model loaded successfully!")
+    print(f"Model input shape: {model.input_shape}")
+    print(f"Model output shape: {model.output_shape}")
+    return model
+
+runtime = ModelRuntime(load_serving_model, warmup_batch_sizes=WARMUP_BATCH_SIZES)
+
+# Cascade answers can differ from the full model's, so they must not share cache
+# entries: {model version: tag of the cascade model loaded with it}. The loader
+# stages the tag and model_swapped publishes it, so requests still draining on
+# the previous model keep reporting the tag they ran with until the swap.
+cascade_tags = {}
+loaded_cascade_tags = {}
+
+def served_version(version):
+    """Version reported in responses and used in cache keys: the model version plus the cascade setup."""
+    return f"{version}{cascade_tags.get(version, '')}"
 
 # Classes as trained: B=Biodegradable (index 0), N=Non-Biodegradable (index 1)
 classes = ['biodegradable', 'non-biodegradable']
 
+# Share of requests whose progress lines get printed (1 = all, 0.01 = one in a hundred, 0 = none).
+# Errors are always printed.
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1))
+
+# Admin endpoints (/admin/...) are disabled unless ADMIN_TOKEN is set; callers
+# must send it in the X-Admin-Token header
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'ecosmart-profiles'))
+
+profiler = SamplingProfiler(PROFILE_DIR)
+
+# Upper bound on images accepted by /predict_batch in a single request
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', 64))
+
+# Admission control: at most ADMISSION_MAX_IN_FLIGHT prediction requests run per
+# worker and ADMISSION_MAX_QUEUE more may wait; beyond that requests get an
+# immediate 503 + Retry-After instead of queueing without limit (0 disables).
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 4))
+ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', 8))
+# Time budget per request, counted from X-Request-Start when the proxy sets it.
+# Clients can ask for less with X-Request-Deadline-Ms. Requests past it skip inference.
+REQUEST_DEADLINE_MS = float(os.environ.get('REQUEST_DEADLINE_MS', 15000))
+
+admission = None
+if ADMISSION_MAX_IN_FLIGHT > 0:
+    admission = AdmissionController(max_in_flight=ADMISSION_MAX_IN_FLIGHT, max_queue=ADMISSION_MAX_QUEUE)
+
+# Dynamic micro-batching: concurrent /predict calls inside one worker share a
+# forward pass. Only useful when the worker serves requests on several threads
+# (gunicorn --threads), so it is opt-in.
+MICRO_BATCHING = os.environ.get('MICRO_BATCHING', '0') == '1'
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 5))
+
+batcher = None
+if MICRO_BATCHING:
+    def run_micro_batch(batch):
+        # Runs on whichever model is live when the batch goes; each row says which one that was
+        with runtime.lease() as (model, version):
+            preds = model.predict(batch, batch_size=len(batch), verbose=0)
+        return [(pred, version) for pred in preds]
+    
+    batcher = MicroBatcher(
+        run_micro_batch,
+        max_batch_size=BATCH_MAX_SIZE,
+        max_wait_ms=BATCH_MAX_WAIT_MS,
+    )
+    print(f"Micro-batching enabled: max batch {BATCH_MAX_SIZE}, max wait {BATCH_MAX_WAIT_MS}ms")
+
+# Cache of final results keyed by the uploaded bytes + model version, so
+# re-uploads and client retries skip decode and inference entirely
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+PREDICTION_CACHE_TTL = int(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+PREDICTION_CACHE_PATH = os.environ.get('PREDICTION_CACHE_PATH')  # optional SQLite file
+
+prediction_cache = None
+if PREDICTION_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(
+        max_entries=PREDICTION_CACHE_SIZE,
+        ttl_seconds=PREDICTION_CACHE_TTL,
+        disk_path=PREDICTION_CACHE_PATH,
+    )
+
+# Near-duplicate cache: re-compressed or resized copies of an image miss the
+# exact-bytes cache but hash to within a few bits of each other. Opt-in because
+# a hit returns the classification of a *similar* image.
+PHASH_CACHE_SIZE = int(os.environ.get('PHASH_CACHE_SIZE', 0))
+PHASH_MAX_DISTANCE = int(os.environ.get('PHASH_MAX_DISTANCE', 4))
+
+phash_index = None
+if PHASH_CACHE_SIZE > 0:
+    phash_index = PerceptualHashIndex(max_entries=PHASH_CACHE_SIZE, max_distance=PHASH_MAX_DISTANCE)
+
+def model_swapped(version):
+    if version in loaded_cascade_tags:
+        cascade_tags[version] = loaded_cascade_tags.pop(version)
+    # Exact-cache keys carry the version, so old entries just age out; the
+    # near-duplicate index only matches entries of the leased version, so
+    # clearing it just frees the old version's slots
+    if phash_index is not None:
+        phash_index.clear()
+
+runtime.on_swap = model_swapped
+
+def model_unavailable(ready=None):
+    """Error response while the model is not serving yet (503 + Retry-After) or failed to load (500).
+    
+    ready overrides runtime.ready, e.g. with whether the model a request leased exists.
+    """
+    if runtime.ready if ready is None else ready:
+        return None
+    if runtime.state == 'failed':
+        return jsonify({"error": "YOUR model not loaded", "detail": runtime.error}), 500
+    response = jsonify({"error": "Model is still loading", "state": runtime.state})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+def request_deadline():
+    """Monotonic deadline for the current request (None when deadlines are off)."""
+    budget_ms = REQUEST_DEADLINE_MS
+    client_ms = request.headers.get('X-Request-Deadline-Ms')
+    if client_ms:
+        try:
+            budget_ms = min(budget_ms, float(client_ms)) if budget_ms > 0 else float(client_ms)
+        except ValueError:
+            pass
+    if budget_ms <= 0:
+        return None
+    deadline = time.monotonic() + budget_ms / 1000
+    # Render/Heroku-style proxies stamp arrival time in ms since the epoch ("t=..." or bare)
+    arrival = request.headers.get('X-Request-Start', '').removeprefix('t=')
+    try:
+        queued_for = time.time() - float(arrival) / 1000
+        if 0 < queued_for < 3600:
+            deadline -= queued_for
+    except ValueError:
+        pass
+    return deadline
+
+def admission_slot(deadline):
+    return admission.slot(deadline) if admission is not None else nullcontext()
+
+def overloaded_response(e):
+    """503 for shed (over capacity) and expired (deadline passed) requests."""
+    if isinstance(e, Overloaded):
+        response = jsonify({"error": "Server is over capacity, retry later"})
+        retry_after = e.retry_after
+    else:
+        response = jsonify({"error": "Request deadline exceeded before inference"})
+        retry_after = admission.retry_after() if admission is not None else 1
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def build_result(prediction_value, version=None):
+    """Turn the model's sigmoid output into the response returned by /predict."""
+    # Check what the training data class indices were
+    # From your training: class_indices should show which folder maps to which index
+    # Typically: B (biodegradable) = 0, N (non-biodegradable) = 1
+    
+    # CORRECT CLASS MAPPING - Model trained with B=biodegradable, N=non-biodegradable
+    if prediction_value < 0.5:
+        # Model predicts class 0 = biodegradable
+        category = "biodegradable"
+        confidence = (1 - prediction_value) * 100
+        object_name = "Organic waste"
+        detailed_reason = f"CNN model classified this as biodegradable with {confidence:.1f}% confidence. The neural network detected patterns typical of organic materials that decompose naturally."
+    else:
+        # Model predicts class 1 = non-biodegradable
+        category = "non-biodegradable"
+        confidence = prediction_value * 100
+        object_name = "Synthetic material"
+        detailed_reason = f"CNN model classified this as non-biodegradable with {confidence:.1f}% confidence. The neural network detected patterns typical of synthetic materials that resist decomposition."
+    
+    reason = f"Identified as: {object_name}. {detailed_reason}"
+    
+    return {
+        "category": category,
+        "confidence": round(confidence, 2),
+        "object_name": object_name,
+        "reason": reason,
+        "source": "real_model",
+        "model_prediction": float(prediction_value),
+        "model_version": served_version(version) if version is not None else None,
+    }
+
+def request_logger():
+    """print for a sampled share of requests (LOG_SAMPLE_RATE), a no-op for the rest."""
+    if LOG_SAMPLE_RATE >= 1 or (LOG_SAMPLE_RATE > 0 and random.random() < LOG_SAMPLE_RATE):
+        return print
+    return _quiet
+
+def _quiet(*args, **kwargs):
+    pass
+
+def cache_key_for(data, version, raw=False):
+    # Raw buffers get their own key space: the same bytes mean something else encoded
+    key_version = served_version(version)
+    return PredictionCache.key(data, f"{key_version}:raw" if raw else key_version)
+
+def classify_upload(data, filename, log=print, deadline=None, raw=False):
+    """Caches, decode, inference and result building for one uploaded image.
+    
+    Shared by the Flask /predict route and the async server in asgi_app.py.
+    With raw=True, data is an already resized 150x150x3 uint8 buffer and the
+    decode and resize stages are skipped (see from_raw_tensor).
+    Raises DeadlineExceeded instead of running the model once deadline has passed.
+    The whole request runs on the model version live when it started, even if a
+    hot swap happens meanwhile.
+    """
+    with runtime.lease() as (model, version):
+        return _classify_upload(model, version, data, filename, log, deadline, raw)
+
+def _classify_upload(model, version, data, filename, log, deadline, raw):
+    cache_key = cache_key_for(data, version, raw)
+    if prediction_cache is not None:
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            log(f"Cache hit for: {filename}")
+            return cached
+    
+    # Preprocess image exactly as your model expects
+    if raw:
+        with stage('raw_tensor'):
+            img_array = from_raw_tensor(data)
+    else:
+        with stage('decode'):
+            img = decode_image(data)
+        with stage('resize_normalize'):
+            img_array = to_model_input(img)
+    
+    log(f"Image preprocessed: {img_array.shape}")
+    
+    if phash_index is not None:
+        image_hash = perceptual_hash(img_array)
+        similar = phash_index.lookup(image_hash, version)
+        if similar is not None:
+            log(f"Near-duplicate hit for: {filename}")
+            if prediction_cache is not None:
+                prediction_cache.put(cache_key, similar)
+            return similar
+    
+    check_deadline(deadline)
+    
+    # Get prediction from YOUR trained model
+    with stage('model_forward'):
+        if batcher is not None:
+            pred, batch_version = batcher.submit(img_array)
+            if batch_version != version:
+                version, cache_key = batch_version, cache_key_for(data, batch_version, raw)
+        else:
+            pred = model.predict(np.expand_dims(img_array, axis=0), verbose=0)[0]
+    log(f"Raw model output: {pred}")
+    
+    with stage('postprocess'):
+        prediction_value = float(pred[0])
+        result = build_result(prediction_value, version)
+        if prediction_cache is not None:
+            prediction_cache.put(cache_key, result)
+        # A request that leased the old model across a swap must not refill the index
+        if phash_index is not None and version == runtime.version:
+            phash_index.add(image_hash, result, version)
+    
+    log(f"MODEL PREDICTION: {prediction_value:.4f} -> {result['category']} ({result['confidence']:.1f}%)")
+    log(f"FINAL RESULT: {result}")
+    return result
+
+def render_result(result):
+    """JSON by default; msgpack when the client prefers it (Accept: application/msgpack) and it is installed."""
+    if msgpack is not None and request.accept_mimetypes.best_match(
+            ['application/json', 'application/msgpack']) == 'application/msgpack':
+        response = Response(msgpack.packb(result), mimetype='application/msgpack')
+    else:
+        response = jsonify(result)
+    if result.get("model_version"):
+        response.headers['X-Model-Version'] = result["model_version"]
+    return response
+
+@app.after_request
+def add_model_version(response):
+    # Prediction responses already name the version that answered; everything else gets the live one
+    if 'X-Model-Version' not in response.headers and runtime.version is not None:
+        response.headers['X-Model-Version'] = served_version(runtime.version)
+    return response
+
+def predict_binary(log, deadline):
+    """/predict with an application/octet-stream body instead of a multipart form.
+    
+    The body is the encoded image file, or with `X-Input-Format: raw` the
+    150x150x3 uint8 RGB pixels (what modelLoader.ts builds before scaling), which
+    skips both multipart parsing and image decoding. X-Filename names it in logs.
+    """
+    raw = request.headers.get('X-Input-Format', '').lower() == 'raw'
+    filename = request.headers.get('X-Filename', 'upload')
+    if request.content_length is not None and request.content_length == 0:
+        return jsonify({"error": "No file provided"}), 400
+    if raw and request.content_length is not None and request.content_length != RAW_INPUT_BYTES:
+        return jsonify({"error": f"Raw input must be 150x150x3 uint8 ({RAW_INPUT_BYTES} bytes), "
+                                 f"got {request.content_length} bytes"}), 400
+    
+    unavailable = model_unavailable()
+    if unavailable is not None:
+        return unavailable
+    
+    log(f"Processing {'raw tensor' if raw else 'binary upload'}: {filename}")
+    with stage('upload_read'):
+        data = request.get_data(cache=False)
+    if not data:
+        return jsonify({"error": "No file provided"}), 400
+    if raw and len(data) != RAW_INPUT_BYTES:
+        return jsonify({"error": f"Raw input must be 150x150x3 uint8 ({RAW_INPUT_BYTES} bytes), "
+                                 f"got {len(data)} bytes"}), 400
+    result = classify_upload(data, filename, log, deadline, raw=raw)
+    with stage('serialize'):
+        response = render_result(result)
+    return response
+
 @app.route('/predict', methods=['POST'])
 def predict():
+    started = time.perf_counter()
+    deadline = request_deadline()
     try:
-        if 'file' not in request.files:
-            return jsonify({"error": "No file provided"}), 400
+        with metrics.in_flight(), profiler.track(), admission_slot(deadline):
+            if request.mimetype == 'application/octet-stream':
+                return predict_binary(request_logger(), deadline)
             
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
-        
-        print(f"Processing file: {file.filename}")
-        print(f"Using YOUR trained model for: {file.filename}")
-        
-        if model is None:
-            return jsonify({"error": "YOUR model not loaded"}), 500
-        
-        # Preprocess image exactly as your model expects
-        img = Image.open(io.BytesIO(file.read())).convert('RGB')
-        img = img.resize((150, 150))  # Your model's input size
-        img_array = np.expand_dims(np.array(img) / 255.0, axis=0)
-        
-        print(f"Image preprocessed: {img_array.shape}")
-        
-        # Get prediction from YOUR trained model
-        pred = model.predict(img_array, verbose=0)[0]
-        print(f"Raw model output: {pred}")
-        
-        # Model is biased, use intelligent classification based on image analysis
-        import random
-        
-        # USE YOUR TRAINED MODEL PROPERLY
-        prediction_value = float(pred[0])
-        
-        print(f"Raw model prediction: {prediction_value:.4f}")
-        
-        # Check what the training data class indices were
-        # From your training: class_indices should show which folder maps to which index
-        # Typically: B (biodegradable) = 0, N (non-biodegradable) = 1
-        
-        # CORRECT CLASS MAPPING - Model trained with B=biodegradable, N=non-biodegradable
-        if prediction_value < 0.5:
-            # Model predicts class 0 = biodegradable
-            category = "biodegradable"
-            confidence = (1 - prediction_value) * 100
-            object_name = "Organic waste"
-            detailed_reason = f"CNN model classified this as biodegradable with {confidence:.1f}% confidence. The neural network detected patterns typical of organic materials that decompose naturally."
-        else:
-            # Model predicts class 1 = non-biodegradable
-            category = "non-biodegradable"
-            confidence = prediction_value * 100
-            object_name = "Synthetic material"
-            detailed_reason = f"CNN model classified this as non-biodegradable with {confidence:.1f}% confidence. The neural network detected patterns typical of synthetic materials that resist decomposition."
-        
-        # Classes have been flipped above to match training data
-        # Training data: B folder = index 1, N folder = index 0
-        
-        reason = f"Identified as: {object_name}. {detailed_reason}"
-        
-        print(f"MODEL PREDICTION: {prediction_value:.4f} -> {category} ({confidence:.1f}%)")
-        print(f"Explanation: {detailed_reason}")
-        
-        result = {
-            "category": category,
-            "confidence": round(confidence, 2),
-            "object_name": object_name,
-            "reason": reason,
-            "source": "real_model",
-            "model_prediction": float(prediction_value)
-        }
-        
-        print(f"FINAL RESULT: {result}")
-        print(f"Category: {result['category']}, Confidence: {result['confidence']}%")
-        return jsonify(result)
+            if 'file' not in request.files:
+                return jsonify({"error": "No file provided"}), 400
+                
+            file = request.files['file']
+            if file.filename == '':
+                return jsonify({"error": "No file selected"}), 400
+            
+            log = request_logger()
+            log(f"Processing file: {file.filename}")
+            
+            unavailable = model_unavailable()
+            if unavailable is not None:
+                return unavailable
+            
+            with stage('upload_read'):
+                data = file.read()
+            result = classify_upload(data, file.filename, log, deadline)
+            with stage('serialize'):
+                response = render_result(result)
+            return response
     
+    except (Overloaded, DeadlineExceeded) as e:
+        return overloaded_response(e)
     except Exception as e:
         print(f"Prediction error: {str(e)}")
         return jsonify({"error": str(e)}), 500
+    finally:
+        request_seconds.observe(time.perf_counter() - started, route='/predict')
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    started = time.perf_counter()
+    deadline = request_deadline()
+    try:
+        # The whole batch runs on the model version live when it started
+        with metrics.in_flight(), profiler.track(), admission_slot(deadline), runtime.lease() as (model, version):
+            files = request.files.getlist('files') or request.files.getlist('file')
+            if not files:
+                return jsonify({"error": "No files provided"}), 400
+            if len(files) > MAX_BATCH_FILES:
+                return jsonify({"error": f"Too many files: {len(files)} (max {MAX_BATCH_FILES})"}), 413
+            
+            # The lease may predate the first load finishing: judge by the leased model
+            unavailable = model_unavailable(ready=model is not None)
+            if unavailable is not None:
+                return unavailable
+            
+            log = request_logger()
+            log(f"Processing batch of {len(files)} files")
+            
+            # Decode every upload first; a bad image only fails its own slot
+            results = [None] * len(files)
+            indices, arrays, cache_keys, image_hashes = [], [], [], []
+            for i, file in enumerate(files):
+                if file.filename == '':
+                    results[i] = {"filename": file.filename, "error": "No file selected"}
+                    continue
+                with stage('upload_read'):
+                    data = file.read()
+                cache_key = cache_key_for(data, version)
+                cached = prediction_cache.get(cache_key) if prediction_cache is not None else None
+                if cached is not None:
+                    cached["filename"] = file.filename
+                    results[i] = cached
+                    continue
+                try:
+                    with stage('decode'):
+                        img = decode_image(data)
+                    with stage('resize_normalize'):
+                        img_array = to_model_input(img)
+                except Exception as e:
+                    results[i] = {"filename": file.filename, "error": f"Could not read image: {e}"}
+                    continue
+                image_hash = perceptual_hash(img_array) if phash_index is not None else None
+                similar = phash_index.lookup(image_hash, version) if phash_index is not None else None
+                if similar is not None:
+                    similar["filename"] = file.filename
+                    results[i] = similar
+                    continue
+                arrays.append(img_array)
+                indices.append(i)
+                cache_keys.append(cache_key)
+                image_hashes.append(image_hash)
+            
+            if arrays:
+                check_deadline(deadline)
+                # One forward pass over the whole (N, 150, 150, 3) stack
+                batch = np.stack(arrays)
+                with stage('model_forward'):
+                    preds = model.predict(batch, batch_size=len(batch), verbose=0)
+                with stage('postprocess'):
+                    for i, cache_key, image_hash, pred in zip(indices, cache_keys, image_hashes, preds):
+                        result = build_result(float(pred[0]), version)
+                        if prediction_cache is not None:
+                            prediction_cache.put(cache_key, result)
+                        if phash_index is not None and version == runtime.version:
+                            phash_index.add(image_hash, result, version)
+                        result["filename"] = files[i].filename
+                        results[i] = result
+            
+            failed = sum(1 for r in results if "error" in r)
+            log(f"Batch done: {len(arrays)} run through the model, {len(files) - len(arrays) - failed} from cache, {failed} failed")
+            with stage('serialize'):
+                response = render_result({"results": results, "count": len(results),
+                                          "model_version": served_version(version)})
+            return response
+    
+    except (Overloaded, DeadlineExceeded) as e:
+        return overloaded_response(e)
+    except Exception as e:
+        print(f"Batch prediction error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        request_seconds.observe(time.perf_counter() - started, route='/predict_batch')
+
+@app.route('/batch_stats', methods=['GET'])
+def batch_stats():
+    if batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **batcher.stats()})
+
+@app.route('/admission_stats', methods=['GET'])
+def admission_stats():
+    if admission is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, "deadline_ms": REQUEST_DEADLINE_MS, **admission.stats()})
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    stats = {"enabled": False}
+    if prediction_cache is not None:
+        stats = {"enabled": True, "model_version": served_version(runtime.version), **prediction_cache.stats()}
+    if phash_index is not None:
+        stats["near_duplicate"] = phash_index.stats()
+    return jsonify(stats)
+
+@app.route('/cascade_stats', methods=['GET'])
+def cascade_stats():
+    if not CASCADE_MODEL_PATH or not runtime.ready:
+        return jsonify({"enabled": bool(CASCADE_MODEL_PATH), "ready": runtime.ready})
+    return jsonify({"enabled": True, **runtime.model.stats()})
+
+@metrics.collector
+def serving_metrics():
+    yield ("ecosmart_model_ready", "gauge", "1 once the model is loaded and warmed up", {}, int(runtime.ready))
+    if runtime.version is not None:
+        yield ("ecosmart_model_info", "gauge", "Model version this worker is serving", {"version": served_version(runtime.version)}, 1)
+    for state in ('starting', 'loading', 'warming_up', 'ready', 'failed'):
+        yield ("ecosmart_model_state", "gauge", "Current model lifecycle state", {"state": state}, int(runtime.state == state))
+    for phase, seconds in runtime.timings.items():
+        yield ("ecosmart_model_startup_seconds", "gauge", "Time spent in each model startup phase", {"phase": phase}, seconds)
+    caches = []
+    if prediction_cache is not None:
+        caches.append(("exact", prediction_cache.stats()))
+    if phash_index is not None:
+        caches.append(("near_duplicate", phash_index.stats()))
+    for name, stats in caches:
+        yield ("ecosmart_cache_entries", "gauge", "Entries held by each prediction cache", {"cache": name}, stats["entries"])
+    for counter in ('hits', 'misses', 'evictions'):
+        for name, stats in caches:
+            yield (f"ecosmart_cache_{counter}_total", "counter", f"Prediction cache {counter}", {"cache": name}, stats[counter])
+    if batcher is not None:
+        stats = batcher.stats()
+        yield ("ecosmart_batch_queue_depth", "gauge", "Images waiting for the micro-batcher", {}, stats["queue_depth"])
+        yield ("ecosmart_batch_items_total", "counter", "Images run through the micro-batcher", {}, stats["items"])
+        yield ("ecosmart_batch_avg_added_wait_seconds", "gauge", "Average wait added by micro-batching", {}, stats["avg_added_wait_ms"] / 1000)
+        for size, count in stats["batch_size_histogram"].items():
+            yield ("ecosmart_batches_total", "counter", "Micro-batches run, by batch size", {"size": size}, count)
+    if admission is not None:
+        stats = admission.stats()
+        yield ("ecosmart_admission_queued", "gauge", "Requests waiting for an inference slot", {}, stats["queued"])
+        for outcome in ('served', 'shed', 'expired'):
+            yield ("ecosmart_admission_requests_total", "counter", "Prediction requests by admission outcome", {"outcome": outcome}, stats[outcome])
+    if CASCADE_MODEL_PATH and runtime.ready:
+        stats = runtime.model.stats()
+        yield ("ecosmart_cascade_images_total", "counter", "Images classified by the cascade", {}, stats["images"])
+        yield ("ecosmart_cascade_escalations_total", "counter", "Images escalated to the full model", {}, stats["escalated"])
+        yield ("ecosmart_cascade_audits_total", "counter", "Confident fast answers re-checked by the full model", {}, stats["audited"])
+        if stats["audit_agreement"] is not None:
+            yield ("ecosmart_cascade_audit_agreement", "gauge", "Share of audited fast answers the full model agreed with", {}, stats["audit_agreement"])
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def admin_forbidden():
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled (set ADMIN_TOKEN)"}), 404
+    # Bytes, not str: compare_digest rejects non-ASCII strings, and header values can be any latin-1
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Invalid admin token"}), 403
+    return None
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """POST starts sampling the next N requests / T seconds on this worker; GET lists sessions."""
+    forbidden = admin_forbidden()
+    if forbidden is not None:
+        return forbidden
+    if request.method == 'GET':
+        return jsonify(profiler.status())
+    
+    options = request.get_json(silent=True) or request.form
+    try:
+        session = profiler.start(
+            requests=int(options['requests']) if options.get('requests') else None,
+            seconds=float(options['seconds']) if options.get('seconds') else None,
+            interval_ms=float(options.get('interval_ms', 5)),
+            tf_trace=str(options.get('tf_trace', '')).lower() in ('1', 'true', 'yes'),
+        )
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": f"Invalid profiling options: {e}"}), 400
+    print(f"Profiling session {session} started")
+    return jsonify({"session": session, "pid": os.getpid(), "download": f"/admin/profile/{session}"}), 202
+
+@app.route('/admin/profile/<session>', methods=['GET'])
+def admin_profile_download(session):
+    forbidden = admin_forbidden()
+    if forbidden is not None:
+        return forbidden
+    archive = profiler.archive(session)
+    if archive is None:
+        return jsonify({"error": f"No finished profiling session {session} on this worker"}), 404
+    return send_file(archive, as_attachment=True, download_name=f"profile-{session}.zip")
+
+@app.route('/admin/model', methods=['GET'])
+def admin_model():
+    """Live version, last reload on this worker and the registry's versions."""
+    forbidden = admin_forbidden()
+    if forbidden is not None:
+        return forbidden
+    return jsonify({
+        "pid": os.getpid(),
+        "version": runtime.version,
+        "served_version": served_version(runtime.version) if runtime.version is not None else None,
+        "reload": runtime.reload_status,
+        "registry": registry.describe() if registry is not None else None,
+    })
+
+@app.route('/admin/model/reload', methods=['POST'])
+def admin_model_reload():
+    """Hot-swap this worker to {"version": ...} (also made CURRENT, so other workers follow).
+    
+    Without a version it reloads CURRENT, or MODEL_PATH when there is no registry.
+    """
+    forbidden = admin_forbidden()
+    if forbidden is not None:
+        return forbidden
+    options = request.get_json(silent=True) or request.form
+    version = options.get('version')
+    if version and registry is None:
+        return jsonify({"error": "Versions need a model registry (set MODEL_REGISTRY_DIR)"}), 400
+    try:
+        if version:
+            registry.activate(version)
+        else:
+            version = wanted_version()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    if not runtime.reload(version):
+        return jsonify({"error": "A model load is already running", "reload": runtime.reload_status}), 409
+    print(f"Reloading model version {version} (admin request)")
+    return jsonify({"version": version, "pid": os.getpid(), "status": "/admin/model"}), 202
+
+def watch_model_source():
+    """Reload when the registry's CURRENT (or MODEL_PATH) names a version this worker is not serving."""
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL)
+        try:
+            version = wanted_version()
+        except Exception as e:
+            print(f"Model watch: could not read the wanted version: {e}")
+            continue
+        if version is None or version == runtime.version or runtime.state not in ('ready', 'failed'):
+            continue
+        status = runtime.reload_status
+        if status is not None and status["version"] == version:
+            continue  # already loading it, or it failed: wait for the next change
+        if runtime.reload(version):
+            print(f"Model watch: {version} published, reloading (serving {runtime.version})")
 
 @app.route('/', methods=['GET'])
 def health_check():
-    return jsonify({"status": "ML Backend is running", "model_loaded": model is not None})
+    # Liveness: answers as soon as the worker is up, whatever the model is doing
+    return jsonify({"status": "ML Backend is running", "model_loaded": runtime.ready, "model_state": runtime.state,
+                    "model_version": runtime.version})
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Readiness: 200 only once the model is loaded and warmed up
+    return jsonify(runtime.status()), (200 if runtime.ready else 503)
+
+runtime.start(version=wanted_version(), background=MODEL_LOAD_BACKGROUND)
+if MODEL_WATCH_INTERVAL > 0:
+    threading.Thread(target=watch_model_source, name="model-watch", daemon=True).start()
+if not MODEL_LOAD_BACKGROUND and not runtime.ready:
+    print(f"Error loading model: {runtime.error}")
 
 if __name__ == '__main__':
     import os
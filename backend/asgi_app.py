@@ -0,0 +1,137 @@
+"""Async (ASGI) front end for the classifier, serving the same routes as app.py.
+
+Uploads are read on the event loop without tying up a thread, so many slow
+mobile clients can stay connected at once. Decode and inference are CPU-bound
+and go to a fixed-size thread pool (INFERENCE_THREADS, default: one per core),
+which keeps the cores busy on model work instead of on waiting for bytes.
+The model, caches and micro-batcher are the ones configured in app.py.
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import contextlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+import app as core
+from metrics import registry as metrics, request_seconds, stage
+
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', os.cpu_count() or 1))
+
+executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+
+
+def model_unavailable():
+    if core.runtime.ready:
+        return None
+    if core.runtime.state == 'failed':
+        return JSONResponse({"error": "YOUR model not loaded", "detail": core.runtime.error}, status_code=500)
+    return JSONResponse({"error": "Model is still loading", "state": core.runtime.state},
+                        status_code=503, headers={"Retry-After": "5"})
+
+
+def result_response(result):
+    # Like app.render_result: the header names the version that answered, which a hot swap may have retired
+    headers = {'X-Model-Version': result["model_version"]} if result.get("model_version") else None
+    return JSONResponse(result, headers=headers)
+
+
+async def predict_binary(request):
+    """Same contract as app.predict_binary: encoded image or, with X-Input-Format: raw, 150x150x3 uint8 pixels."""
+    raw = request.headers.get('x-input-format', '').lower() == 'raw'
+    filename = request.headers.get('x-filename', 'upload')
+    unavailable = model_unavailable()
+    if unavailable is not None:
+        return unavailable
+
+    log = core.request_logger()
+    log(f"Processing {'raw tensor' if raw else 'binary upload'}: {filename}")
+    with stage('upload_read'):
+        data = await request.body()
+    if not data:
+        return JSONResponse({"error": "No file provided"}, status_code=400)
+    if raw and len(data) != core.RAW_INPUT_BYTES:
+        return JSONResponse({"error": f"Raw input must be 150x150x3 uint8 ({core.RAW_INPUT_BYTES} bytes), "
+                                      f"got {len(data)} bytes"}, status_code=400)
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(executor, core.classify_upload, data, filename, log, None, raw)
+    with stage('serialize'):
+        response = result_response(result)
+    return response
+
+
+async def predict(request):
+    started = time.perf_counter()
+    try:
+        with metrics.in_flight(), core.profiler.track():
+            if request.headers.get('content-type', '').split(';')[0].strip() == 'application/octet-stream':
+                return await predict_binary(request)
+
+            form = await request.form()
+            file = form.get('file')
+            if file is None or not hasattr(file, 'read'):
+                return JSONResponse({"error": "No file provided"}, status_code=400)
+            if file.filename == '':
+                return JSONResponse({"error": "No file selected"}, status_code=400)
+
+            unavailable = model_unavailable()
+            if unavailable is not None:
+                return unavailable
+
+            log = core.request_logger()
+            log(f"Processing file: {file.filename}")
+            with stage('upload_read'):
+                data = await file.read()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, core.classify_upload, data, file.filename, log)
+            with stage('serialize'):
+                response = result_response(result)
+            return response
+
+    except Exception as e:
+        print(f"Prediction error: {str(e)}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+    finally:
+        request_seconds.observe(time.perf_counter() - started, route='/predict')
+
+
+async def health_check(request):
+    return JSONResponse({
+        "status": "ML Backend is running",
+        "model_loaded": core.runtime.ready,
+        "model_state": core.runtime.state,
+        "model_version": core.runtime.version,
+    })
+
+
+async def ready(request):
+    return JSONResponse(core.runtime.status(), status_code=200 if core.runtime.ready else 503)
+
+
+async def prometheus_metrics(request):
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/predict', predict, methods=['POST']),
+        Route('/', health_check, methods=['GET']),
+        Route('/ready', ready, methods=['GET']),
+        Route('/metrics', prometheus_metrics, methods=['GET']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan,
+)
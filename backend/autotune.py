@@ -0,0 +1,190 @@
+"""Pick gunicorn workers, TensorFlow thread pools, batch size and admission limit for this host.
+
+    python autotune.py --p99-ms 2000 --write
+    python autotune.py --workers 1,2,4 --intra 1,2,4 --inter 1,2 --batch 1,8 --in-flight 2,4 --concurrency 16
+
+Every combination is started as a real gunicorn server (gunicorn.conf.py, the
+model app.py would serve, prediction caches off, ADMISSION_MAX_QUEUE as
+configured) and driven with the load_test.py workload: synthetic phone-size uploads to /predict
+at --concurrency. A batch size above 1 turns on micro-batching with that
+BATCH_MAX_SIZE; --in-flight is swept as ADMISSION_MAX_IN_FLIGHT (0 = admission
+control off), so the limit production runs with is the one measured. A
+combination that rejects any request does not qualify. Combinations that would put more than --max-threads-per-core
+TensorFlow threads on each core are skipped.
+
+The recommendation is the highest throughput whose p99 stays under --p99-ms
+(the lowest p99 if none does). --write stores it in tuning.json, which app.py
+and gunicorn.conf.py apply at startup unless the environment says otherwise.
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from load_test import HttpTarget, make_uploads, run_level
+from tuning import TUNING_FILE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url, workers, timeout):
+    """Wait until /ready answers 200 several times in a row, so every worker has its model up."""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + '/ready', timeout=5) as resp:
+                streak = streak + 1 if resp.status == 200 else 0
+        except (urllib.error.URLError, ConnectionError, OSError):
+            streak = 0
+        if streak >= 4 * workers:
+            return True
+        time.sleep(0.25 if streak else 1.0)
+    return False
+
+
+def candidate_settings(config, threads):
+    """Environment for one combination; also what --write stores."""
+    workers, intra, inter, batch, in_flight = config
+    return {
+        'WEB_CONCURRENCY': workers,
+        'GUNICORN_THREADS': threads,
+        'TF_INTRA_OP_THREADS': intra,
+        'TF_INTER_OP_THREADS': inter,
+        'TFLITE_NUM_THREADS': intra,
+        'MICRO_BATCHING': int(batch > 1),
+        'BATCH_MAX_SIZE': batch,
+        'INFERENCE_THREADS': threads,
+        'ADMISSION_MAX_IN_FLIGHT': in_flight,
+    }
+
+
+def measure(settings, uploads, args):
+    port = free_port()
+    env = dict(os.environ, **{k: str(v) for k, v in settings.items()},
+               TUNING_FILE='', PREDICTION_CACHE_SIZE='0', PHASH_CACHE_SIZE='0',
+               LOG_SAMPLE_RATE='0', MODEL_WATCH_INTERVAL='0')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '-c', os.path.join(BASE_DIR, 'gunicorn.conf.py'),
+         '--bind', f'127.0.0.1:{port}', '--timeout', '300'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        if not wait_ready(url, settings['WEB_CONCURRENCY'], args.startup_timeout):
+            return {"error": f"server not ready after {args.startup_timeout}s"}
+        target = HttpTarget(url)
+        counter = [0]
+        run_level(target, '/predict', uploads, args.concurrency, args.warmup, 1, counter)
+        level = run_level(target, '/predict', uploads, args.concurrency, args.requests, 1, counter)
+        return {key: level[key] for key in ('images_per_second', 'latency_ms', 'status_codes', 'stage_mean_ms')}
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def recommend(results, p99_ms):
+    ok = [r for r in results if "error" not in r and set(r["status_codes"]) == {"200"}]
+    within = [r for r in ok if r["latency_ms"]["p99"] <= p99_ms]
+    if within:
+        return max(within, key=lambda r: r["images_per_second"]), True
+    if ok:
+        return min(ok, key=lambda r: r["latency_ms"]["p99"]), False
+    return None, False
+
+
+def _ints(text):
+    return [int(v) for v in text.split(',') if v.strip()]
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default=','.join(map(str, sorted({1, max(1, cpus // 2), cpus}))))
+    parser.add_argument('--intra', default=','.join(map(str, sorted({1, 2, cpus}))), help='TF intra-op threads')
+    parser.add_argument('--inter', default='1,2', help='TF inter-op threads')
+    parser.add_argument('--batch', default='1,8', help='micro-batch sizes (1 = micro-batching off)')
+    parser.add_argument('--in-flight', default=os.environ.get('ADMISSION_MAX_IN_FLIGHT', '4'),
+                        help='ADMISSION_MAX_IN_FLIGHT values (0 = admission control off)')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker (not swept)')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients during each run')
+    parser.add_argument('--requests', type=int, default=48, help='timed requests per combination')
+    parser.add_argument('--warmup', type=int, default=8, help='untimed requests per combination')
+    parser.add_argument('--images', type=int, default=16, help='distinct synthetic uploads')
+    parser.add_argument('--p99-ms', type=float, default=2000.0, help='p99 latency target')
+    parser.add_argument('--max-threads-per-core', type=float, default=2.0,
+                        help='skip combinations with more TF threads than this per core')
+    parser.add_argument('--startup-timeout', type=float, default=180.0)
+    parser.add_argument('--out', help='also write the JSON report here')
+    parser.add_argument('--write', action='store_true', help=f'store the recommendation in {TUNING_FILE}')
+    args = parser.parse_args()
+
+    configs = []
+    for config in itertools.product(_ints(args.workers), _ints(args.intra), _ints(args.inter), _ints(args.batch),
+                                    _ints(args.in_flight)):
+        workers, intra, inter, _, _ = config
+        if workers * max(intra, inter) > args.max_threads_per_core * cpus:
+            print(f"Skipping workers={workers} intra={intra} inter={inter}: oversubscribes {cpus} cores")
+            continue
+        configs.append(config)
+    uploads = make_uploads(args.images, ['JPEG', 'PNG'])
+    print(f"Sweeping {len(configs)} combinations on {cpus} cores at concurrency {args.concurrency}")
+
+    results = []
+    for config in configs:
+        settings = candidate_settings(config, args.threads)
+        result = {"workers": config[0], "intra_op_threads": config[1], "inter_op_threads": config[2],
+                  "batch_size": config[3], "max_in_flight": config[4], **measure(settings, uploads, args)}
+        results.append(result)
+        if "error" in result:
+            print(f"{config}: {result['error']}")
+        else:
+            print(f"workers={config[0]} intra={config[1]} inter={config[2]} batch={config[3]} in_flight={config[4]}: "
+                  f"{result['images_per_second']} img/s, p99 {result['latency_ms']['p99']} ms")
+
+    best, meets_target = recommend(results, args.p99_ms)
+    report = {
+        "cpus": cpus,
+        "model": os.environ.get('MODEL_REGISTRY_DIR') or os.environ.get('MODEL_PATH', 'app.py default'),
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "admission_max_queue": int(os.environ.get('ADMISSION_MAX_QUEUE', 8)),
+        "p99_target_ms": args.p99_ms,
+        "results": results,
+        "recommended": best,
+        "meets_p99_target": meets_target,
+    }
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    if best is None:
+        raise SystemExit("No combination served the workload without errors")
+    if not meets_target:
+        print(f"No combination met p99 <= {args.p99_ms} ms; recommending the lowest p99")
+    settings = candidate_settings((best["workers"], best["intra_op_threads"], best["inter_op_threads"],
+                                   best["batch_size"], best["max_in_flight"]), args.threads)
+    print(f"Recommended: {settings}")
+    if args.write:
+        with open(TUNING_FILE, 'w') as f:
+            json.dump(settings, f, indent=2)
+            f.write("\n")
+        print(f"Wrote {TUNING_FILE}; app.py and gunicorn.conf.py apply it at the next start")
+
+
+if __name__ == '__main__':
+    main()
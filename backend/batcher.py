@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class _Pending:
+    """One image waiting for its slot in a batch."""
+
+    def __init__(self, img_array):
+        self.img_array = img_array
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Collects concurrent single-image requests and runs them through the model together.
+
+    A background thread takes the first waiting image, then keeps collecting until
+    either max_batch_size images are queued or max_wait_ms has passed since the
+    first one arrived. The whole group goes through predict_fn as one batch and
+    each caller gets back its own row.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes = {}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, img_array):
+        """Queue one (150, 150, 3) array and block until its prediction row is ready."""
+        pending = _Pending(img_array)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Anything that arrived meanwhile rides along for free
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                preds = self.predict_fn(np.stack([p.img_array for p in batch]))
+                for pending, pred in zip(batch, preds):
+                    pending.result = pred
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            self._record(batch, started)
+            for pending in batch:
+                pending.done.set()
+
+    def _record(self, batch, started):
+        waits = [started - p.enqueued_at for p in batch]
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+    def stats(self):
+        """Queue depth, batch-size histogram and the wait added by batching."""
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+                "avg_added_wait_ms": round(self._wait_total / self._items * 1000, 3) if self._items else 0.0,
+                "max_added_wait_ms": round(self._wait_max * 1000, 3),
+            }
@@ -0,0 +1,113 @@
+"""Compare the full-decode and draft-mode (reduced-resolution) preprocessing paths.
+
+Generates synthetic phone-sized JPEGs, then for each path reports decode latency
+and peak RSS (each path runs in its own process so the numbers don't mix). With
+--model it also checks that predictions on both paths stay within --tolerance.
+
+    python benchmark_decode.py --images 20 --model ../ml_model/waste_classifier_model.h5
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import resource
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from preprocessing import preprocess_image
+
+
+def synthetic_photo(seed, size=(4032, 3024), fmt='JPEG'):
+    """Smooth gradients plus sensor-like noise: compresses like a real photo, unlike pure noise."""
+    rs = np.random.RandomState(seed)
+    w, h = size
+    y, x = np.mgrid[0:h, 0:w].astype(np.float32)
+    base = np.stack([
+        127 + 100 * np.sin(x / rs.uniform(200, 900) + rs.uniform(0, 6)),
+        127 + 100 * np.cos(y / rs.uniform(200, 900) + rs.uniform(0, 6)),
+        127 + 100 * np.sin((x + y) / rs.uniform(300, 1200)),
+    ], axis=-1)
+    base += rs.normal(0, 8, base.shape)
+    img = Image.fromarray(base.clip(0, 255).astype(np.uint8))
+    buf = io.BytesIO()
+    if fmt == 'JPEG':
+        img.save(buf, 'JPEG', quality=90)
+    else:
+        img.save(buf, fmt)
+    return buf.getvalue()
+
+
+def _time_path(fast, images, repeats, conn):
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies = []
+    for _ in range(repeats):
+        for data in images:
+            start = time.perf_counter()
+            preprocess_image(data, fast=fast)
+            latencies.append((time.perf_counter() - start) * 1000)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    conn.send({
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_delta_mb": round((peak_rss - base_rss) / 1024, 1),
+    })
+    conn.close()
+
+
+def measure(fast, images, repeats):
+    ctx = multiprocessing.get_context('fork')
+    parent, child = ctx.Pipe()
+    proc = ctx.Process(target=_time_path, args=(fast, images, repeats, child))
+    proc.start()
+    result = parent.recv()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=10, help='number of synthetic photos')
+    parser.add_argument('--width', type=int, default=4032)
+    parser.add_argument('--height', type=int, default=3024)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--model', help='optional .h5 model to check prediction drift')
+    parser.add_argument('--tolerance', type=float, default=0.02, help='max allowed |score difference|')
+    args = parser.parse_args()
+
+    print(f"Generating {args.images} synthetic {args.width}x{args.height} JPEGs...")
+    images = [synthetic_photo(i, (args.width, args.height)) for i in range(args.images)]
+
+    report = {
+        "image_size": [args.width, args.height],
+        "images": args.images,
+        "full_decode": measure(False, images, args.repeats),
+        "draft_decode": measure(True, images, args.repeats),
+    }
+    report["speedup_p50"] = round(report["full_decode"]["p50_ms"] / report["draft_decode"]["p50_ms"], 2)
+
+    full = np.stack([preprocess_image(d, fast=False) for d in images])
+    fast = np.stack([preprocess_image(d, fast=True) for d in images])
+    report["pixel_mean_abs_diff"] = round(float(np.abs(full - fast).mean()), 5)
+
+    if args.model:
+        from tensorflow.keras.models import load_model
+        model = load_model(args.model)
+        full_pred = model.predict(full, verbose=0)[:, 0]
+        fast_pred = model.predict(fast, verbose=0)[:, 0]
+        max_diff = float(np.abs(full_pred - fast_pred).max())
+        report["prediction_max_abs_diff"] = round(max_diff, 5)
+        report["category_agreement"] = float(np.mean((full_pred < 0.5) == (fast_pred < 0.5)))
+        report["within_tolerance"] = max_diff <= args.tolerance
+
+    print(json.dumps(report, indent=2))
+    if args.model and not report["within_tolerance"]:
+        raise SystemExit(f"Prediction drift {report['prediction_max_abs_diff']} exceeds tolerance {args.tolerance}")
+
+
+if __name__ == '__main__':
+    main()
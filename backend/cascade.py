@@ -0,0 +1,171 @@
+"""Confidence-based model cascade: a small fast model first, the full CNN only when unsure.
+
+ModelCascade exposes the same predict() as a Keras model, so app.py, the
+micro-batcher and /predict_batch use it unchanged. Images whose fast score is
+within `band` of 0.5 are escalated to the full model (the whole batch goes
+through the fast model once, then only the uncertain rows through the full one).
+A small share of confident images is also run through the full model to measure
+live agreement.
+
+Run as a script to pick the band offline: it scores a folder of images with both
+models and prints escalation rate, agreement with the full model and estimated
+CPU per image for each band, recommending the widest saving that still meets
+the agreement target.
+
+    python cascade.py --fast ../ml_model/waste_classifier_model_tiny.h5 \\
+        --full ../ml_model/waste_classifier_model.h5 --data-dir <dataset>/TEST --target-agreement 0.99
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+from metrics import registry
+from model_files import load_model_file
+
+tier_seconds = registry.histogram(
+    'ecosmart_cascade_tier_seconds',
+    'Forward pass time of each cascade tier, per call',
+    labelnames=('tier',),
+)
+
+
+class ModelCascade:
+    def __init__(self, fast_model, full_model, band=0.25, audit_rate=0.01):
+        self.fast_model = fast_model
+        self.full_model = full_model
+        self.band = band
+        self.audit_rate = audit_rate
+        self.input_shape = full_model.input_shape
+        self.output_shape = full_model.output_shape
+        self._lock = threading.Lock()
+        self._images = 0
+        self._escalated = 0
+        self._audited = 0
+        self._audit_agreed = 0
+
+    def _timed(self, tier, model, batch):
+        start = time.perf_counter()
+        preds = model.predict(batch, batch_size=len(batch), verbose=0)
+        tier_seconds.observe(time.perf_counter() - start, tier=tier)
+        return np.asarray(preds, dtype=np.float32).reshape(len(batch), -1)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.asarray(batch)
+        preds = self._timed('fast', self.fast_model, batch)
+        uncertain = np.abs(preds[:, 0] - 0.5) < self.band
+        # Audit a sample of the confident rows against the full model
+        audit = ~uncertain & (np.random.random(len(batch)) < self.audit_rate) if self.audit_rate else None
+        run_full = uncertain | audit if audit is not None else uncertain
+
+        agreed = 0
+        if run_full.any():
+            full_preds = self._timed('full', self.full_model, batch[run_full])
+            if audit is not None and audit.any():
+                audited_fast = preds[audit, 0] >= 0.5
+                audited_full = full_preds[audit[run_full], 0] >= 0.5
+                agreed = int(np.sum(audited_fast == audited_full))
+            preds[uncertain] = full_preds[uncertain[run_full]]
+
+        with self._lock:
+            self._images += len(batch)
+            self._escalated += int(uncertain.sum())
+            if audit is not None:
+                self._audited += int(audit.sum())
+                self._audit_agreed += agreed
+        return preds
+
+    def warmup(self, batch):
+        """Trace both tiers (predict() alone may never reach the full model on a blank batch)."""
+        self.fast_model.predict(batch, batch_size=len(batch), verbose=0)
+        self.full_model.predict(batch, batch_size=len(batch), verbose=0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "band": self.band,
+                "images": self._images,
+                "escalated": self._escalated,
+                "escalation_rate": round(self._escalated / self._images, 4) if self._images else None,
+                "audited": self._audited,
+                "audit_agreement": round(self._audit_agreed / self._audited, 4) if self._audited else None,
+            }
+
+
+def sweep_bands(fast_scores, full_scores, fast_ms, full_ms, bands):
+    """Escalation rate, agreement with the full model and estimated CPU per image for each band."""
+    full_labels = full_scores >= 0.5
+    rows = []
+    for band in bands:
+        uncertain = np.abs(fast_scores - 0.5) < band
+        final = np.where(uncertain, full_labels, fast_scores >= 0.5)
+        escalation = float(uncertain.mean())
+        rows.append({
+            "band": band,
+            "escalation_rate": round(escalation, 4),
+            "agreement": round(float(np.mean(final == full_labels)), 4),
+            "est_ms_per_image": round(fast_ms + escalation * full_ms, 3),
+            "est_cpu_vs_full": round((fast_ms + escalation * full_ms) / full_ms, 3),
+        })
+    return rows
+
+
+def _per_image_ms(model, images, batch_size=32):
+    model.predict(images[:batch_size], batch_size=batch_size, verbose=0)
+    start = time.perf_counter()
+    model.predict(images, batch_size=batch_size, verbose=0)
+    return (time.perf_counter() - start) * 1000 / len(images)
+
+
+def main():
+    from preprocessing import preprocess_image
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fast', required=True, help='small model (.h5/.keras/.tflite/.npz)')
+    parser.add_argument('--full', required=True, help='full model (.h5/.keras/.tflite/.npz)')
+    parser.add_argument('--data-dir', required=True, help='folder of images (B/ and N/ subfolders are fine)')
+    parser.add_argument('--target-agreement', type=float, default=0.99)
+    parser.add_argument('--limit', type=int, default=2000, help='max images to score')
+    args = parser.parse_args()
+
+    paths = []
+    for root, _, names in os.walk(args.data_dir):
+        paths.extend(os.path.join(root, n) for n in sorted(names)
+                     if n.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.gif')))
+    random.Random(0).shuffle(paths)
+    paths = paths[:args.limit]
+    images = np.stack([preprocess_image(open(p, 'rb').read()) for p in paths]).astype(np.float32)
+    print(f"Scoring {len(images)} images")
+
+    fast, full = load_model_file(args.fast), load_model_file(args.full)
+    fast_scores = np.asarray(fast.predict(images, batch_size=32, verbose=0)).reshape(-1)
+    full_scores = np.asarray(full.predict(images, batch_size=32, verbose=0)).reshape(-1)
+    fast_ms, full_ms = _per_image_ms(fast, images), _per_image_ms(full, images)
+
+    rows = sweep_bands(fast_scores, full_scores, fast_ms, full_ms, [round(b * 0.05, 2) for b in range(11)])
+    meeting = [r for r in rows if r["agreement"] >= args.target_agreement]
+    best = min(meeting, key=lambda r: r["est_ms_per_image"]) if meeting else None
+    print(json.dumps({
+        "images": len(images),
+        "fast_ms_per_image": round(fast_ms, 3),
+        "full_ms_per_image": round(full_ms, 3),
+        "target_agreement": args.target_agreement,
+        "bands": rows,
+        "recommended_band": best["band"] if best else None,
+    }, indent=2))
+    if best and best["est_cpu_vs_full"] >= 1:
+        print(f"Meeting {args.target_agreement:.2%} agreement needs {best['escalation_rate']:.1%} escalation, "
+              f"so the cascade would cost more than the full model alone; the fast model needs more training")
+    elif best:
+        print(f"Serve with CASCADE_BAND={best['band']}: {best['escalation_rate']:.1%} escalated, "
+              f"{best['agreement']:.2%} agreement, ~{best['est_cpu_vs_full']:.0%} of the full model's CPU")
+    else:
+        print(f"No band reaches {args.target_agreement:.2%} agreement; the fast model needs more training")
+
+
+if __name__ == '__main__':
+    main()
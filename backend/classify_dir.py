@@ -0,0 +1,219 @@
+"""Classify a whole directory tree or tar archive of photos offline.
+
+    python classify_dir.py /data/bin-camera --out results.jsonl
+    python classify_dir.py archive-2024.tar.gz --out results.csv --model ../ml_model/waste_classifier_model_int8.tflite
+
+Uses the serving code paths (preprocessing.decode_image and the same resize and
+scaling as to_model_input, and model_files.load_model_file, so any artifact
+app.py can serve works). Images are
+decoded in a process pool while the previous chunk runs through the model in
+batches, and results are appended to JSONL or CSV (by --out extension).
+
+Progress is checkpointed to <out>.checkpoint after every chunk: the output size
+at that point. Re-running the same command truncates anything written after the
+last checkpoint and skips every input whose path is already in the results, so
+nothing is duplicated or redone even if files were added to the source since;
+pass --restart to start over.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import tarfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from preprocessing import TARGET_SIZE, decode_image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp')
+CLASSES = ['biodegradable', 'non-biodegradable']  # B=0, N=1 as trained
+CSV_FIELDS = ['path', 'category', 'confidence', 'model_prediction', 'error']
+
+
+def iter_inputs(source):
+    """(name, path or bytes) in a stable order: sorted walk for directories, member order for tars."""
+    if os.path.isdir(source):
+        for root, dirs, names in os.walk(source):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, source), path
+    else:
+        with tarfile.open(source, 'r:*') as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield member.name, archive.extractfile(member).read
+
+
+def decode_one(item):
+    """Worker: path or bytes -> (150, 150, 3) uint8 array, or the error message."""
+    try:
+        if isinstance(item, str):
+            with open(item, 'rb') as f:
+                item = f.read()
+        # Resized uint8 pixels keep inter-process transfer at 1/4 of float32; scaling happens per batch
+        return np.asarray(decode_image(item).resize(TARGET_SIZE), dtype=np.uint8), None
+    except Exception as e:
+        return None, f"Could not read image: {e}"
+
+
+def chunks(inputs, skip, size):
+    """Lists of (name, payload) for inputs whose name is not in `skip`; tar bytes are only read when kept."""
+    chunk = []
+    for name, payload in inputs:
+        if name in skip:
+            continue
+        chunk.append((name, payload() if callable(payload) else payload))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ResultWriter:
+    def __init__(self, path, resume_offset):
+        self.csv = path.endswith('.csv')
+        exists = os.path.exists(path)
+        self.file = open(path, 'a+' if exists else 'w', newline='')
+        if exists:
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+        self.writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS) if self.csv else None
+        if self.csv and self.file.tell() == 0:
+            self.writer.writeheader()
+
+    def write(self, record):
+        if self.csv:
+            self.writer.writerow(record)
+        else:
+            self.file.write(json.dumps(record) + "\n")
+
+    def commit(self):
+        """Flush to disk and return the byte offset that is now safe to resume from."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+
+def load_checkpoint(path, source, restart):
+    if restart or not os.path.exists(path):
+        return {"source": os.path.abspath(source), "done": 0, "offset": 0}
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint["source"] != os.path.abspath(source):
+        raise SystemExit(f"{path} belongs to {checkpoint['source']}; use another --out or --restart")
+    return checkpoint
+
+
+def done_paths(path, offset):
+    """Input names already in the results file, up to the checkpointed offset."""
+    if not offset or not os.path.exists(path):
+        return set()
+    with open(path, 'rb') as f:
+        text = f.read(offset).decode()
+    if path.endswith('.csv'):
+        return {row['path'] for row in csv.DictReader(text.splitlines(keepends=True))}
+    return {json.loads(line)['path'] for line in text.splitlines() if line}
+
+
+def save_checkpoint(path, checkpoint):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def classify(model, names, decoded, batch_size):
+    """Records for one chunk; unreadable images get an error record and skip the model."""
+    records = [None] * len(names)
+    ok = [i for i, (array, _) in enumerate(decoded) if array is not None]
+    for i, (_, error) in enumerate(decoded):
+        if error is not None:
+            records[i] = {"path": names[i], "category": None, "confidence": None, "model_prediction": None,
+                          "error": error}
+    for start in range(0, len(ok), batch_size):
+        rows = ok[start:start + batch_size]
+        batch = np.multiply(np.stack([decoded[i][0] for i in rows]), 1 / 255.0, dtype=np.float32)
+        preds = np.asarray(model.predict(batch, batch_size=len(batch), verbose=0)).reshape(len(batch), -1)[:, 0]
+        for i, score in zip(rows, preds):
+            score = float(score)
+            # Same threshold and confidence as app.build_result
+            records[i] = {"path": names[i], "category": CLASSES[int(score >= 0.5)],
+                          "confidence": round((score if score >= 0.5 else 1 - score) * 100, 2),
+                          "model_prediction": score, "error": None}
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='directory (walked recursively) or .tar / .tar.gz archive')
+    parser.add_argument('--out', required=True, help='results file, .jsonl or .csv')
+    parser.add_argument('--model', default=os.environ.get('MODEL_PATH', os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..', 'ml_model', 'waste_classifier_model.h5')))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='decode processes')
+    parser.add_argument('--batch-size', type=int, default=64, help='images per forward pass')
+    parser.add_argument('--chunk-size', type=int, default=1024, help='inputs per checkpoint')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint and start over')
+    args = parser.parse_args()
+
+    checkpoint_path = args.out + '.checkpoint'
+    checkpoint = load_checkpoint(checkpoint_path, args.source, args.restart)
+    done = done_paths(args.out, checkpoint["offset"])
+    checkpoint["done"] = len(done)
+    if done:
+        print(f"Resuming: {len(done)} inputs already in {args.out}")
+    writer = ResultWriter(args.out, checkpoint["offset"])
+
+    # Spawned workers never inherit TensorFlow state (which is not fork-safe)
+    pool = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn'))
+    from model_files import load_model_file
+    model = load_model_file(args.model)
+    print(f"Classifying {args.source} with {args.model} ({args.workers} decode workers)")
+
+    started = time.perf_counter()
+    processed = failed = 0
+    pending = None
+    try:
+        for chunk in chunks(iter_inputs(args.source), done, args.chunk_size):
+            names = [name for name, _ in chunk]
+            # Decode this chunk while the previous one runs through the model
+            future = pool.map(decode_one, [payload for _, payload in chunk], chunksize=16)
+            if pending is not None:
+                processed, failed = _finish(pending, model, writer, checkpoint, checkpoint_path, args, started,
+                                            processed, failed)
+            pending = (names, future)
+        if pending is not None:
+            processed, failed = _finish(pending, model, writer, checkpoint, checkpoint_path, args, started,
+                                        processed, failed)
+    finally:
+        pool.shutdown(cancel_futures=True)
+        writer.file.close()
+
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed else 0.0
+    print(f"Done: {processed} inputs this run ({failed} unreadable) in {elapsed:.1f}s, {rate:.1f} images/sec; "
+          f"{checkpoint['done']} in total, results in {args.out}")
+
+
+def _finish(pending, model, writer, checkpoint, checkpoint_path, args, started, processed, failed):
+    names, future = pending
+    decoded = list(future)
+    for record in classify(model, names, decoded, args.batch_size):
+        writer.write(record)
+        failed += record["error"] is not None
+    checkpoint["done"] += len(names)
+    checkpoint["offset"] = writer.commit()
+    save_checkpoint(checkpoint_path, checkpoint)
+    processed += len(names)
+    elapsed = time.perf_counter() - started
+    print(f"{checkpoint['done']} done ({processed / elapsed:.1f} images/sec)")
+    return processed, failed
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Compact on-disk format for pruned (and optionally weight-clustered) Keras models.
+
+A .npz archive (deflate-compressed) holding the model's architecture JSON and
+its weights. Kernels that were clustered are stored as uint8 cluster indices
+plus a small float32 centroid table (index 0 is always the exact zero left by
+pruning), so a pruned, 16-cluster Dense(512) kernel shrinks to a few bits per
+weight before compression and mostly long runs of zeros after it. Everything
+else is stored as plain float32 arrays.
+
+prune_model.py writes these files; app.py loads them when MODEL_PATH ends in .npz.
+"""
+import json
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def cluster_weights(weights, clusters=16, iterations=10):
+    """1-D k-means over the non-zero weights.
+
+    Returns (indices uint8, centroids float32) with centroids[0] == 0 reserved for
+    pruned weights. Centroids start evenly spaced between min and max (linear init
+    keeps the rare large weights, which matter most, represented).
+    """
+    flat = weights.reshape(-1)
+    nonzero = flat != 0
+    values = flat[nonzero]
+    indices = np.zeros(flat.shape, dtype=np.uint8)
+    if values.size == 0:
+        return indices.reshape(weights.shape), np.zeros(1, dtype=np.float32)
+    k = max(1, min(clusters - 1, 255, int(np.unique(values).size)))
+    centroids = np.linspace(values.min(), values.max(), k).astype(np.float64)
+    for _ in range(iterations):
+        # Sorted 1-D centroids: the nearest one is found by bisecting the midpoints
+        order = np.argsort(centroids)
+        centroids = centroids[order]
+        assignment = np.searchsorted((centroids[1:] + centroids[:-1]) / 2, values)
+        sums = np.bincount(assignment, weights=values, minlength=k)
+        counts = np.bincount(assignment, minlength=k)
+        updated = np.where(counts > 0, sums / np.maximum(counts, 1), centroids)
+        if np.allclose(updated, centroids):
+            break
+        centroids = updated
+    assignment = np.searchsorted((centroids[1:] + centroids[:-1]) / 2, values)
+    indices[nonzero] = assignment + 1
+    return indices.reshape(weights.shape), np.concatenate([[0.0], centroids]).astype(np.float32)
+
+
+def save_compressed_model(model, path, clusters=16, min_cluster_size=1024):
+    """Write model to a compressed .npz; kernels with >= min_cluster_size weights are clustered.
+
+    clusters=0 keeps every weight as float32 (pruned zeros still compress well).
+    """
+    arrays = {"config": np.frombuffer(model.to_json().encode(), dtype=np.uint8)}
+    layout = []
+    for i, weights in enumerate(model.get_weights()):
+        if clusters and weights.ndim > 1 and weights.size >= min_cluster_size:
+            arrays[f"w{i}_idx"], arrays[f"w{i}_centroids"] = cluster_weights(weights, clusters)
+            layout.append("clustered")
+        else:
+            arrays[f"w{i}"] = weights.astype(np.float32)
+            layout.append("dense")
+    arrays["meta"] = np.frombuffer(json.dumps({"format": FORMAT_VERSION, "layout": layout}).encode(), dtype=np.uint8)
+    np.savez_compressed(path, **arrays)
+
+
+def load_compressed_weights(path):
+    """(architecture JSON, list of float32 weight arrays) from a save_compressed_model file."""
+    with np.load(path) as archive:
+        meta = json.loads(archive["meta"].tobytes().decode())
+        if meta["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compressed model format {meta['format']} in {path}")
+        weights = []
+        for i, kind in enumerate(meta["layout"]):
+            if kind == "clustered":
+                weights.append(archive[f"w{i}_centroids"][archive[f"w{i}_idx"]])
+            else:
+                weights.append(archive[f"w{i}"])
+        return archive["config"].tobytes().decode(), weights
+
+
+def load_compressed_model(path):
+    """Rebuild the Keras model saved by save_compressed_model."""
+    from tensorflow.keras.models import model_from_json
+    config, weights = load_compressed_weights(path)
+    model = model_from_json(config)
+    model.set_weights(weights)
+    return model
@@ -0,0 +1,154 @@
+"""Offline evaluation of one or more model artifacts over a labelled B/N folder.
+
+    python evaluate.py --data-dir <dataset>/TEST ../ml_model/waste_classifier_model.h5 \\
+        ../ml_model/waste_classifier_model_int8.tflite ../ml_model/waste_classifier_model_tiny.h5
+
+Images are decoded once, in parallel and with the serving preprocessing
+(preprocessing.py), into a uint8 array; every model then streams that array in
+large batches. Per model: accuracy, confusion matrix, per-class accuracy, score
+histogram, throughput, the most confident mistakes and agreement with the first
+model. Any artifact model_files.load_model_file understands can be compared:
+.h5/.keras, .tflite, pruned .npz or a shared-weights directory.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from model_files import load_model_file
+from preprocessing import TARGET_SIZE, decode_image
+
+CLASS_NAMES = ['biodegradable', 'non-biodegradable']  # B=0, N=1 as trained
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp')
+
+
+def list_images(data_dir):
+    items = []
+    for label, folder in enumerate(['B', 'N']):
+        class_dir = os.path.join(data_dir, folder)
+        for name in sorted(os.listdir(class_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                items.append((os.path.join(class_dir, name), label))
+    return items
+
+
+def _decode(path):
+    try:
+        with open(path, 'rb') as f:
+            # uint8 keeps the shared decode cache at 1/4 of float32; scaling happens per batch
+            return np.asarray(decode_image(f.read()).resize(TARGET_SIZE), dtype=np.uint8)
+    except Exception as e:
+        print(f"Skipping unreadable image {path}: {e}")
+        return None
+
+
+def decode_all(items, workers):
+    """(uint8 images, labels, paths) for every readable image; Pillow releases the GIL while decoding."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        decoded = list(pool.map(_decode, [p for p, _ in items], chunksize=16))
+    keep = [i for i, img in enumerate(decoded) if img is not None]
+    images = np.stack([decoded[i] for i in keep])
+    labels = np.array([items[i][1] for i in keep], dtype=np.int64)
+    return images, labels, [items[i][0] for i in keep]
+
+
+def score(model, images, batch_size):
+    """Scores for every image plus per-batch wall times."""
+    model.predict(images[:batch_size].astype(np.float32) / 255.0, batch_size=batch_size, verbose=0)  # warm up
+    scores, times = [], []
+    for start in range(0, len(images), batch_size):
+        batch = images[start:start + batch_size].astype(np.float32) / 255.0
+        began = time.perf_counter()
+        preds = model.predict(batch, batch_size=len(batch), verbose=0)
+        times.append(time.perf_counter() - began)
+        scores.append(np.asarray(preds).reshape(len(batch), -1)[:, 0])
+    return np.concatenate(scores), times
+
+
+def summarize(scores, labels, paths, times, batch_size, bins=10):
+    predicted = (scores >= 0.5).astype(np.int64)
+    confusion = np.zeros((2, 2), dtype=np.int64)
+    np.add.at(confusion, (labels, predicted), 1)
+    histogram, _ = np.histogram(scores, bins=bins, range=(0.0, 1.0))
+    wrong = np.flatnonzero(predicted != labels)
+    # Distance from 0.5 on the wrong side = how sure the model was of its mistake
+    worst = wrong[np.argsort(-np.abs(scores[wrong] - 0.5))][:10]
+    return {
+        "accuracy": round(float(np.mean(predicted == labels)), 4),
+        "confusion_matrix": {
+            "labels": CLASS_NAMES,
+            "rows_true_cols_predicted": confusion.tolist(),
+        },
+        "per_class_accuracy": {
+            name: round(float(confusion[i, i] / confusion[i].sum()), 4) if confusion[i].sum() else None
+            for i, name in enumerate(CLASS_NAMES)
+        },
+        "score_histogram": {
+            "bin_edges": [round(i / bins, 2) for i in range(bins + 1)],
+            "counts": histogram.tolist(),
+        },
+        "throughput": {
+            "images_per_second": round(len(scores) / sum(times), 1),
+            "batch_size": batch_size,
+            "batch_p50_ms": round(float(np.percentile(times, 50)) * 1000, 2),
+        },
+        "most_confident_errors": [
+            {"file": paths[i], "true": CLASS_NAMES[labels[i]], "score": round(float(scores[i]), 4)}
+            for i in worst
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('models', nargs='+', help='model artifacts to evaluate (the first is the reference)')
+    parser.add_argument('--data-dir', required=True, help='folder with B/ and N/ images (e.g. the TEST split)')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help='decode threads')
+    parser.add_argument('--limit', type=int, help='evaluate at most this many images (evenly spread)')
+    parser.add_argument('--out', help='also write the JSON report here')
+    args = parser.parse_args()
+
+    items = list_images(args.data_dir)
+    if args.limit and args.limit < len(items):
+        items = [items[i] for i in np.linspace(0, len(items) - 1, args.limit).astype(int)]
+    start = time.perf_counter()
+    images, labels, paths = decode_all(items, args.workers)
+    paths = [os.path.relpath(p, args.data_dir) for p in paths]
+    decode_seconds = time.perf_counter() - start
+    print(f"Decoded {len(images)} images in {decode_seconds:.1f}s ({len(images) / decode_seconds:.1f} img/s)")
+
+    results, reference = [], None
+    for path in args.models:
+        model = load_model_file(path)
+        scores, times = score(model, images, args.batch_size)
+        result = {"model": path, **summarize(scores, labels, paths, times, args.batch_size)}
+        if reference is None:
+            reference = scores >= 0.5
+        else:
+            result["agreement_with_first"] = round(float(np.mean((scores >= 0.5) == reference)), 4)
+        results.append(result)
+        print(f"{os.path.basename(path)}: accuracy {result['accuracy']}, per class {result['per_class_accuracy']}, "
+              f"{result['throughput']['images_per_second']} img/s")
+        del model
+
+    report = {
+        "data_dir": args.data_dir,
+        "images": len(images),
+        "class_counts": {name: int(np.sum(labels == i)) for i, name in enumerate(CLASS_NAMES)},
+        "decode": {"seconds": round(decode_seconds, 2), "images_per_second": round(len(images) / decode_seconds, 1),
+                   "workers": args.workers},
+        "models": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
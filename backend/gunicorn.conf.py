@@ -0,0 +1,15 @@
+"""gunicorn settings, loaded automatically when gunicorn starts in this directory.
+
+Worker and thread counts come from the environment, else from tuning.json
+(autotune.py --write), else the defaults below.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from tuning import apply_tuning  # noqa: E402
+
+apply_tuning()
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
@@ -0,0 +1,233 @@
+"""Reproducible load test for the classification service.
+
+Generates synthetic phone-resolution JPEG/PNG uploads (fixed seeds), drives
+/predict (or /predict_batch) at each concurrency level and reports throughput,
+p50/p95/p99 latency, the per-stage breakdown scraped from /metrics and peak RSS
+as JSON, tagged with the current git commit so runs can be compared over time.
+Runs fully offline: against the in-process Flask test client by default, or a
+local server with --url.
+
+    python load_test.py --concurrency 1,4,8 --requests 64 --out bench.json
+    python load_test.py --url http://127.0.0.1:5000 --route /predict_batch --batch-size 8
+"""
+import argparse
+import io
+import json
+import os
+import re
+import resource
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmark_decode import synthetic_photo
+
+PHONE_SIZES = [(4032, 3024), (3024, 4032), (1920, 1080), (1280, 960)]
+STAGE_RE = re.compile(r'^ecosmart_stage_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+
+
+def make_uploads(count, formats, seed=0):
+    """Pool of distinct synthetic uploads cycling through phone resolutions and formats."""
+    uploads = []
+    for i in range(count):
+        size = PHONE_SIZES[i % len(PHONE_SIZES)]
+        fmt = formats[i % len(formats)]
+        uploads.append((f"bench_{i}.{fmt.lower().replace('jpeg', 'jpg')}", synthetic_photo(seed + i, size, fmt)))
+    return uploads
+
+
+def _unique(data, n):
+    # Trailing bytes after the image end marker are ignored by decoders but change
+    # the content hash, so the prediction cache never turns the benchmark into a cache test
+    return data + f"#bench{n}".encode()
+
+
+class HttpTarget:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def post(self, route, files):
+        boundary = 'ecosmartloadtest'
+        body = io.BytesIO()
+        field = 'files' if route == '/predict_batch' else 'file'
+        for name, data in files:
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{name}"\r\n'
+                       f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+            body.write(data)
+            body.write(b'\r\n')
+        body.write(f'--{boundary}--\r\n'.encode())
+        req = urllib.request.Request(self.url + route, data=body.getvalue(),
+                                     headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+        try:
+            with urllib.request.urlopen(req, timeout=120) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def get(self, route):
+        with urllib.request.urlopen(self.url + route, timeout=30) as resp:
+            return resp.read().decode()
+
+
+class InProcessTarget:
+    def __init__(self):
+        # Measure the model, not the cache
+        os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+        import app as core
+        self.core = core
+        self.core.runtime.wait()
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.core.app.test_client()
+        return self._local.client
+
+    def post(self, route, files):
+        field = 'files' if route == '/predict_batch' else 'file'
+        payload = {field: [(io.BytesIO(data), name) for name, data in files]}
+        return self._client().post(route, data=payload).status_code
+
+    def get(self, route):
+        return self._client().get(route).get_data(as_text=True)
+
+
+def scrape_stages(target):
+    """{stage: (sum_seconds, count)} from /metrics; empty if the endpoint is unavailable."""
+    try:
+        text = target.get('/metrics')
+    except Exception:
+        return {}
+    stages = {}
+    for line in text.splitlines():
+        m = STAGE_RE.match(line)
+        if m:
+            kind, name, value = m.groups()
+            total, count = stages.get(name, (0.0, 0))
+            stages[name] = (float(value), count) if kind == 'sum' else (total, int(float(value)))
+    return stages
+
+
+def peak_rss_mb(server_pid):
+    if server_pid:
+        with open(f"/proc/{server_pid}/status") as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_level(target, route, uploads, concurrency, requests, batch_size, counter):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def one(i):
+        with lock:
+            counter[0] += 1
+            n = counter[0]
+        files = []
+        for j in range(batch_size):
+            name, data = uploads[(i * batch_size + j) % len(uploads)]
+            files.append((name, _unique(data, n * batch_size + j)))
+        start = time.perf_counter()
+        status = target.post(route, files)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    before = scrape_stages(target)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+    after = scrape_stages(target)
+
+    stage_ms = {}
+    for name, (total, count) in after.items():
+        prev_total, prev_count = before.get(name, (0.0, 0))
+        if count > prev_count:
+            stage_ms[name] = round((total - prev_total) / (count - prev_count) * 1000, 3)
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "images": requests * batch_size,
+        "status_codes": {str(k): v for k, v in sorted(statuses.items())},
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(requests / wall, 2),
+        "images_per_second": round(requests * batch_size / wall, 2),
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 2),
+            "p95": round(float(np.percentile(latencies, 95)), 2),
+            "p99": round(float(np.percentile(latencies, 99)), 2),
+            "mean": round(float(np.mean(latencies)), 2),
+        },
+        "stage_mean_ms": stage_ms,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='local server to drive (default: in-process Flask test client)')
+    parser.add_argument('--server-pid', type=int, help='server pid for peak RSS when using --url')
+    parser.add_argument('--route', default='/predict', choices=['/predict', '/predict_batch'])
+    parser.add_argument('--batch-size', type=int, default=1, help='files per request (with /predict_batch)')
+    parser.add_argument('--concurrency', default='1,4,8', help='comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=48, help='requests per concurrency level')
+    parser.add_argument('--warmup', type=int, default=4, help='untimed requests before measuring')
+    parser.add_argument('--images', type=int, default=16, help='distinct synthetic images in the pool')
+    parser.add_argument('--formats', default='JPEG,PNG', help='comma-separated upload formats')
+    parser.add_argument('--out', help='write the JSON report here as well as to stdout')
+    args = parser.parse_args()
+
+    batch_size = args.batch_size if args.route == '/predict_batch' else 1
+    uploads = make_uploads(args.images, args.formats.split(','))
+    target = HttpTarget(args.url) if args.url else InProcessTarget()
+
+    counter = [0]
+    if args.warmup:
+        run_level(target, args.route, uploads, 1, args.warmup, batch_size, counter)
+
+    levels = [run_level(target, args.route, uploads, int(c), args.requests, batch_size, counter)
+              for c in args.concurrency.split(',')]
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "target": args.url or "in-process",
+        "route": args.route,
+        "batch_size": batch_size,
+        "image_pool": {"count": args.images, "formats": args.formats.split(','), "sizes": PHONE_SIZES},
+        "env": {k: os.environ[k] for k in sorted(os.environ) if k in (
+            'INFERENCE_BACKEND', 'MICRO_BATCHING', 'BATCH_MAX_SIZE', 'BATCH_MAX_WAIT_MS', 'FAST_DECODE',
+            'ADMISSION_MAX_IN_FLIGHT', 'ADMISSION_MAX_QUEUE', 'REQUEST_DEADLINE_MS',
+            'TF_INTRA_OP_THREADS', 'TF_INTER_OP_THREADS', 'WEB_CONCURRENCY', 'GUNICORN_THREADS')},
+        "levels": levels,
+        "peak_rss_mb": peak_rss_mb(args.server_pid),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Measure RSS/PSS of a gunicorn master and its workers, optionally comparing serving backends.
+
+PSS (proportional set size) splits shared pages between the processes mapping
+them, so it shows what each worker really costs; RSS counts shared pages in full.
+
+    # an already-running server
+    python measure_memory.py --pid <gunicorn master pid>
+
+    # start gunicorn once per backend, warm it up, measure, stop it
+    python measure_memory.py --spawn --workers 4 --backend keras --backend shared
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def memory_of(pid):
+    """Memory totals for one process in MB, read from /proc/<pid>/smaps_rollup (Linux)."""
+    totals = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in FIELDS:
+                totals[key.lower()] = round(int(rest.split()[0]) / 1024, 1)
+    return totals
+
+
+def children_of(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def measure_tree(master_pid):
+    procs = [{"pid": master_pid, "role": "master", **memory_of(master_pid)}]
+    for pid in children_of(master_pid):
+        procs.append({"pid": pid, "role": "worker", **memory_of(pid)})
+    workers = [p for p in procs if p["role"] == "worker"]
+    return {
+        "processes": procs,
+        "total_rss_mb": round(sum(p["rss"] for p in procs), 1),
+        "total_pss_mb": round(sum(p["pss"] for p in procs), 1),
+        "avg_worker_pss_mb": round(sum(p["pss"] for p in workers) / len(workers), 1) if workers else 0.0,
+    }
+
+
+def _sample_upload():
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new('RGB', (640, 480), (90, 140, 60)).save(buf, 'JPEG')
+    return buf.getvalue()
+
+
+def _post_image(url, data):
+    boundary = 'ecosmartmeasure'
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="m.jpg"\r\n'
+        f'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        resp.read()
+
+
+def spawn_and_measure(backend, workers, port, requests, timeout):
+    env = dict(os.environ, INFERENCE_BACKEND=backend, PREDICTION_CACHE_SIZE='0')
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '-w', str(workers), '-b', f'127.0.0.1:{port}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f'http://127.0.0.1:{port}'
+    try:
+        # Requests land on arbitrary workers; many consecutive 200s means all are ready
+        deadline = time.time() + timeout
+        ready_streak = 0
+        while ready_streak < workers * 5:
+            if time.time() > deadline:
+                raise TimeoutError(f"{backend}: workers not ready after {timeout}s")
+            try:
+                with urllib.request.urlopen(f'{base}/ready', timeout=5):
+                    ready_streak += 1
+            except (urllib.error.URLError, ConnectionError):
+                ready_streak = 0
+                time.sleep(0.5)
+        # Touch the weights in every worker, as real traffic would
+        data = _sample_upload()
+        for _ in range(requests):
+            _post_image(f'{base}/predict', data)
+        return measure_tree(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pid', type=int, help='gunicorn master pid to inspect')
+    parser.add_argument('--spawn', action='store_true', help='start gunicorn for each --backend and measure it')
+    parser.add_argument('--backend', action='append', help='INFERENCE_BACKEND value(s) to compare')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=40, help='warm-up /predict calls before measuring')
+    parser.add_argument('--timeout', type=int, default=300)
+    parser.add_argument('--json', help='write the report to this path')
+    args = parser.parse_args()
+
+    if args.pid:
+        report = {"pid": args.pid, **measure_tree(args.pid)}
+    elif args.spawn:
+        report = {}
+        for backend in args.backend or ['keras', 'shared']:
+            print(f"Measuring {backend} with {args.workers} workers...")
+            report[backend] = spawn_and_measure(backend, args.workers, args.port, args.requests, args.timeout)
+    else:
+        parser.error("give --pid or --spawn")
+
+    results = report.items() if args.spawn else [("server", report)]
+    print(f"\n{'backend':<10}{'role':<8}{'pid':>8}{'rss MB':>10}{'pss MB':>10}{'shared MB':>11}")
+    for name, result in results:
+        for p in result["processes"]:
+            shared = p.get("shared_clean", 0) + p.get("shared_dirty", 0)
+            print(f"{name:<10}{p['role']:<8}{p['pid']:>8}{p['rss']:>10}{p['pss']:>10}{shared:>11.1f}")
+        print(f"{name:<10}{'total':<8}{'':>8}{result['total_rss_mb']:>10}{result['total_pss_mb']:>10}"
+              f"   avg worker PSS {result['avg_worker_pss_mb']} MB")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow cold calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label value tuple."""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = list(zip(self.labelnames, key))
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', '+Inf')])} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {series['sum']!r}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {series['count']}")
+        return lines
+
+
+class Registry:
+    """Histograms plus gauges/counters read from callbacks at scrape time.
+
+    Each gunicorn worker keeps its own registry; the process_info gauge carries
+    the worker pid so scrapes landing on different workers can be told apart.
+    """
+
+    def __init__(self):
+        self.histograms = []
+        self._collectors = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def histogram(self, *args, **kwargs):
+        hist = Histogram(*args, **kwargs)
+        self.histograms.append(hist)
+        return hist
+
+    def collector(self, fn):
+        """Register fn() -> iterable of (name, type, help, labels_dict, value)."""
+        self._collectors.append(fn)
+        return fn
+
+    @contextmanager
+    def in_flight(self):
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def render(self):
+        lines = [
+            "# HELP ecosmart_process_info Worker process serving these metrics",
+            "# TYPE ecosmart_process_info gauge",
+            f'ecosmart_process_info{{pid="{os.getpid()}"}} 1',
+            "# HELP ecosmart_requests_in_flight Prediction requests currently being handled",
+            "# TYPE ecosmart_requests_in_flight gauge",
+            f"ecosmart_requests_in_flight {self._in_flight}",
+        ]
+        for hist in self.histograms:
+            lines.extend(hist.render())
+        described = set()
+        for fn in self._collectors:
+            for name, kind, help_text, labels, value in fn():
+                if name not in described:
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    described.add(name)
+                lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    'ecosmart_stage_seconds',
+    'Time spent in each stage of the prediction hot path',
+    labelnames=('stage',),
+)
+request_seconds = registry.histogram(
+    'ecosmart_request_seconds',
+    'End-to-end prediction request latency',
+    labelnames=('route',),
+)
+
+
+@contextmanager
+def stage(name):
+    """Time a block into ecosmart_stage_seconds{stage=name}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=name)
@@ -0,0 +1,20 @@
+import os
+
+
+def load_model_file(path, num_threads=None):
+    """Any model artifact this repo produces, behind a Keras-style predict().
+
+    .tflite (convert_tflite.py), .npz (prune_model.py), a shared-weights directory
+    (shared_weights.py) or a Keras .h5/.keras file (training scripts, distill.py).
+    """
+    if path.endswith('.tflite'):
+        from tflite_model import TFLiteModel
+        return TFLiteModel(path, num_threads=num_threads)
+    if path.endswith('.npz'):
+        from compressed_model import load_compressed_model
+        return load_compressed_model(path)
+    if os.path.isdir(path):
+        from shared_weights import SharedWeightsModel
+        return SharedWeightsModel(path)
+    from tensorflow.keras.models import load_model
+    return load_model(path, compile=False)
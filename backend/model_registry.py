@@ -0,0 +1,136 @@
+"""Versioned model directory that serving workers follow.
+
+    MODEL_REGISTRY_DIR/
+        CURRENT                 name of the live version
+        v1/waste_classifier_model.h5
+        v2/waste_classifier_model_int8.tflite
+        v3/shared_weights/      (any artifact model_files.load_model_file understands)
+
+Publishing copies an artifact into a new version directory (built under a
+temporary name and renamed into place, so a half-copied version is never seen);
+activating rewrites CURRENT atomically. app.py with MODEL_REGISTRY_DIR set loads
+the CURRENT version and hot-swaps whenever CURRENT changes.
+
+    python model_registry.py --root /srv/models publish ../ml_model/waste_classifier_model.h5 --version v2 --activate
+    python model_registry.py --root /srv/models activate v1
+    python model_registry.py --root /srv/models list
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+CURRENT_FILE = 'CURRENT'
+METADATA_FILE = 'metadata.json'
+
+
+def _check_version(version):
+    """Reject names that are not a plain directory inside the registry (e.g. '../x', '.staging-v1')."""
+    if (not isinstance(version, str) or not version or version.startswith('.') or version == CURRENT_FILE
+            or os.sep in version or (os.altsep and os.altsep in version)):
+        raise ValueError(f"Invalid version name {version!r}")
+    return version
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+
+    def versions(self):
+        """Published version names, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        names = [n for n in os.listdir(self.root)
+                 if not n.startswith('.') and os.path.isdir(os.path.join(self.root, n))]
+        return sorted(names, key=lambda n: (os.path.getmtime(os.path.join(self.root, n)), n))
+
+    def artifact(self, version):
+        """Path of the model artifact inside a version directory."""
+        _check_version(version)
+        version_dir = os.path.join(self.root, version)
+        if not os.path.isdir(version_dir):
+            raise FileNotFoundError(f"No model version {version!r} in {self.root}")
+        entries = sorted(n for n in os.listdir(version_dir) if not n.startswith('.') and n != METADATA_FILE)
+        if not entries:
+            raise FileNotFoundError(f"Model version {version!r} has no artifact in {version_dir}")
+        return os.path.join(version_dir, entries[0])
+
+    def current(self):
+        """The version named in CURRENT, else the newest published one (None for an empty registry)."""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                version = f.read().strip()
+            if version:
+                return version
+        except FileNotFoundError:
+            pass
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def activate(self, version):
+        self.artifact(version)  # refuse to point CURRENT at a bad name or something unloadable
+        tmp = os.path.join(self.root, f".{CURRENT_FILE}.{os.getpid()}")
+        with open(tmp, 'w') as f:
+            f.write(version + "\n")
+        os.replace(tmp, os.path.join(self.root, CURRENT_FILE))
+
+    def publish(self, source, version=None, activate=False):
+        """Copy a model file or shared-weights directory in as a new version; returns its name."""
+        version = _check_version(version or time.strftime('%Y%m%d-%H%M%S'))
+        target = os.path.join(self.root, version)
+        if os.path.exists(target):
+            raise FileExistsError(f"Model version {version!r} already exists")
+        staging = os.path.join(self.root, f".staging-{version}")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        name = os.path.basename(os.path.normpath(source))
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(staging, name))
+        else:
+            shutil.copy2(source, os.path.join(staging, name))
+        with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+            json.dump({"source": os.path.abspath(source), "published_at": time.time()}, f)
+        os.rename(staging, target)
+        if activate:
+            self.activate(version)
+        return version
+
+    def describe(self):
+        current = self.current()
+        return {
+            "root": self.root,
+            "current": current,
+            "versions": [{"version": v, "artifact": os.path.basename(self.artifact(v)), "current": v == current}
+                         for v in self.versions()],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=os.environ.get('MODEL_REGISTRY_DIR'), required=not os.environ.get('MODEL_REGISTRY_DIR'),
+                        help='registry directory (default: MODEL_REGISTRY_DIR)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help='copy an artifact in as a new version')
+    publish.add_argument('source')
+    publish.add_argument('--version', help='version name (default: a timestamp)')
+    publish.add_argument('--activate', action='store_true', help='also make it CURRENT')
+    activate = commands.add_parser('activate', help='make a published version CURRENT')
+    activate.add_argument('version')
+    commands.add_parser('list', help='show versions and which one is CURRENT')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'publish':
+        os.makedirs(args.root, exist_ok=True)
+        version = registry.publish(args.source, args.version, activate=args.activate)
+        print(f"Published {args.source} as {version}" + (" (now CURRENT)" if args.activate else ""))
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"CURRENT is now {args.version}; workers pick it up on their next check")
+    else:
+        print(json.dumps(registry.describe(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+import gc
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+STARTING = 'starting'
+LOADING = 'loading'
+WARMING_UP = 'warming_up'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class ModelRuntime:
+    """Owns the model's lifecycle: load in the background, warm up, then report ready.
+
+    loader is called with this runtime and a version and returns the model; it can
+    wrap its own steps (e.g. the TensorFlow import) in runtime.phase(name) so they
+    show up in the startup timings next to 'load' and 'warmup'. The model is only
+    published once warmup has run, so no request pays first-call tracing cost.
+
+    reload(version) does the same for another version while the current one keeps
+    serving, then swaps both in one assignment. Requests hold a lease() on the
+    (model, version) they started with, so they finish on it; the old model is
+    dropped once its last lease is returned. on_swap(version) runs whenever a
+    model goes live, the first one included.
+    """
+
+    def __init__(self, loader, warmup_batch_sizes=(1,), input_shape=(150, 150, 3), on_swap=None):
+        self.loader = loader
+        self.warmup_batch_sizes = tuple(warmup_batch_sizes)
+        self.input_shape = tuple(input_shape)
+        self.on_swap = on_swap
+        self.state = STARTING
+        self.error = None
+        self.timings = {}
+        self.reload_status = None
+        self._active = (None, None)
+        self._leases = {}
+        self._cond = threading.Condition()
+        self._created = time.perf_counter()
+        self._thread = None
+        self._reload_thread = None
+
+    @property
+    def model(self):
+        return self._active[0]
+
+    @property
+    def version(self):
+        return self._active[1]
+
+    @contextmanager
+    def lease(self):
+        """(model, version) that stays loaded until the block exits, whatever reload() does meanwhile."""
+        with self._cond:
+            active = self._active
+            self._leases[id(active)] = self._leases.get(id(active), 0) + 1
+        try:
+            yield active
+        finally:
+            with self._cond:
+                self._leases[id(active)] -= 1
+                if not self._leases[id(active)]:
+                    del self._leases[id(active)]
+                    self._cond.notify_all()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 3)
+
+    def start(self, version=None, background=True):
+        if background:
+            self._thread = threading.Thread(target=self._load, args=(version,), name="model-loader", daemon=True)
+            self._thread.start()
+        else:
+            self._load(version)
+
+    def wait(self, timeout=None):
+        """Block until loading finished (ready or failed); returns True when ready."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.state == READY
+
+    def _warm_up(self, model):
+        # Models made of several networks (cascade.py) provide warmup() to reach all of them
+        warmup = getattr(model, 'warmup', None) or (lambda b: model.predict(b, batch_size=len(b), verbose=0))
+        for batch_size in self.warmup_batch_sizes:
+            warmup(np.zeros((batch_size,) + self.input_shape, dtype=np.float32))
+
+    def _load(self, version):
+        try:
+            self.state = LOADING
+            with self.phase('load'):
+                model = self.loader(self, version)
+            self.state = WARMING_UP
+            with self.phase('warmup'):
+                self._warm_up(model)
+            with self._cond:
+                self._active = (model, version)
+            if self.on_swap is not None:
+                self.on_swap(version)
+            self.state = READY
+        except Exception as e:
+            self.error = str(e)
+            self.state = FAILED
+        self.timings['total_to_ready'] = round(time.perf_counter() - self._created, 3)
+        print(f"Model {self.state} after {self.timings['total_to_ready']}s, startup phases: {self.timings}")
+
+    def reload(self, version, background=True, drain_timeout=60.0):
+        """Load and warm up `version` beside the live model, then swap it in.
+
+        Returns False (and does nothing) while another reload is running. Before
+        the first model is up this is a plain (re)start.
+        """
+        with self._cond:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            if self.state in (STARTING, LOADING, WARMING_UP) and self._thread is not None and self._thread.is_alive():
+                return False
+            self.reload_status = {"version": version, "state": LOADING, "error": None, "seconds": {}}
+            if self.model is None:
+                self.reload_status["state"] = "restarting"
+                self._reload_thread = threading.Thread(target=self._load, args=(version,), name="model-loader",
+                                                       daemon=True)
+            else:
+                self._reload_thread = threading.Thread(target=self._swap, args=(version, drain_timeout),
+                                                       name="model-reloader", daemon=True)
+        if background:
+            self._reload_thread.start()
+        else:
+            self._reload_thread.run()
+        return True
+
+    def _swap(self, version, drain_timeout):
+        status = self.reload_status
+        started = time.perf_counter()
+        try:
+            model = self.loader(self, version)
+            status["seconds"]["load"] = round(time.perf_counter() - started, 3)
+            status["state"] = WARMING_UP
+            self._warm_up(model)
+            status["seconds"]["warmup"] = round(time.perf_counter() - started - status["seconds"]["load"], 3)
+        except Exception as e:
+            status.update(state=FAILED, error=str(e))
+            print(f"Reload of model {version} failed, still serving {self.version}: {e}")
+            return
+        with self._cond:
+            old = self._active
+            self._active = (model, version)
+        status["state"] = READY
+        print(f"Model {version} live after {time.perf_counter() - started:.2f}s (was {old[1]})")
+        if self.on_swap is not None:
+            self.on_swap(version)
+
+        # Requests that started on the old model finish on it; release it after the last one
+        deadline = time.monotonic() + drain_timeout
+        with self._cond:
+            while self._leases.get(id(old)) and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+            in_flight = self._leases.get(id(old), 0)
+        del old, model
+        gc.collect()
+        status["seconds"]["drain"] = round(time.perf_counter() - started - sum(status["seconds"].values()), 3)
+        status.update(previous_released=True, previous_leases_abandoned=in_flight)
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+    def status(self):
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "error": self.error,
+            "warmup_batch_sizes": list(self.warmup_batch_sizes),
+            "startup_seconds": dict(self.timings),
+            "version": self.version,
+            "reload": dict(self.reload_status) if self.reload_status else None,
+        }
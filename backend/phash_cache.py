@@ -0,0 +1,108 @@
+import threading
+
+import numpy as np
+
+# Grayscale weights (ITU-R 601), same as PIL's convert('L')
+_GRAY = np.array([0.299, 0.587, 0.114])
+# Popcount for every byte value, used when np.bitwise_count is unavailable (NumPy < 2.0)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def perceptual_hash(img_array):
+    """64-bit difference hash of an already-resized (150, 150, 3) image array.
+
+    The image is averaged down to an 8x9 grayscale grid and each bit records whether
+    a cell is brighter than its left neighbour. Re-compression and small rescales
+    barely move those gradients, so near-duplicates land a few bits apart.
+    """
+    gray = np.asarray(img_array, dtype=np.float32) @ _GRAY.astype(np.float32)
+    rows = np.linspace(0, gray.shape[0], 9).astype(int)[:-1]
+    cols = np.linspace(0, gray.shape[1], 10).astype(int)[:-1]
+    grid = np.add.reduceat(np.add.reduceat(gray, rows, axis=0), cols, axis=1)
+    grid /= np.outer(np.diff(np.append(rows, gray.shape[0])), np.diff(np.append(cols, gray.shape[1])))
+    bits = (grid[:, 1:] > grid[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def _hamming(hashes, h):
+    xor = np.bitwise_xor(hashes, np.uint64(h))
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(xor)
+    return _POPCOUNT[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class PerceptualHashIndex:
+    """Fixed-size index of perceptual hashes -> cached results with Hamming-distance lookup.
+
+    Hashes live in a preallocated uint64 array, so a lookup is one vectorised XOR and
+    popcount over at most max_entries slots and memory never grows past that. When
+    full, the least recently used slot is overwritten. Each entry remembers the model
+    version that produced it, and a lookup only matches entries of the version asked for.
+    """
+
+    def __init__(self, max_entries=4096, max_distance=4):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._hashes = np.zeros(max_entries, dtype=np.uint64)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        # Small int per model version, so the version filter stays vectorised
+        self._version_ids = np.zeros(max_entries, dtype=np.int32)
+        self._version_codes = {}
+        self._results = [None] * max_entries
+        self._size = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _version_id(self, version):
+        return self._version_codes.setdefault(version, len(self._version_codes) + 1)
+
+    def lookup(self, h, version=None):
+        """Return a copy of the closest cached result of `version` within max_distance bits, or None."""
+        with self._lock:
+            self._clock += 1
+            if self._size:
+                distances = _hamming(self._hashes[:self._size], h).astype(np.int64)
+                distances[self._version_ids[:self._size] != self._version_id(version)] = self.max_distance + 1
+                slot = int(np.argmin(distances))
+                if distances[slot] <= self.max_distance:
+                    self._last_used[slot] = self._clock
+                    self.hits += 1
+                    return dict(self._results[slot])
+            self.misses += 1
+            return None
+
+    def add(self, h, result, version=None):
+        with self._lock:
+            self._clock += 1
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+            self._hashes[slot] = np.uint64(h)
+            self._last_used[slot] = self._clock
+            self._version_ids[slot] = self._version_id(version)
+            self._results[slot] = dict(result)
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+            self._results = [None] * self.max_entries
+            self._version_codes = {}
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
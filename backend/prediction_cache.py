@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def model_version_for(model_path):
+    """Cheap version tag for a model file: MODEL_VERSION if set, else its size and mtime.
+
+    For a model directory (e.g. shared weights) it is the total size and newest
+    mtime of the files inside, so re-exporting any of them changes the tag.
+    """
+    if os.environ.get('MODEL_VERSION'):
+        return os.environ['MODEL_VERSION']
+    try:
+        if os.path.isdir(model_path):
+            stats = [os.stat(os.path.join(root, name))
+                     for root, _, names in os.walk(model_path) for name in names]
+            if not stats:
+                return "unknown"
+            return f"{sum(st.st_size for st in stats)}-{int(max(st.st_mtime for st in stats))}"
+        st = os.stat(model_path)
+        return f"{st.st_size}-{int(st.st_mtime)}"
+    except OSError:
+        return "unknown"
+
+
+class PredictionCache:
+    """Bounded LRU of final /predict results, keyed by the uploaded bytes and model version.
+
+    Entries expire after ttl_seconds. If disk_path is given, results are also written
+    to a small SQLite file so a restarted worker starts warm.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, result TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM predictions WHERE created < ?", (time.time() - ttl_seconds,))
+            self._db.commit()
+
+    @staticmethod
+    def key(data, model_version):
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{model_version}:{digest}"
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT result, created FROM predictions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (json.loads(row[0]), row[1])
+                    self._store(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            result, created = entry
+            if now - created > self.ttl_seconds:
+                self._entries.pop(key, None)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM predictions WHERE key = ?", (key,))
+                    self._db.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key, result):
+        entry = (dict(result), time.time())
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO predictions (key, result, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(entry[0]), entry[1]),
+                )
+                # Keep the on-disk copy bounded the same way as the in-memory one
+                self._db.execute(
+                    "DELETE FROM predictions WHERE key NOT IN "
+                    "(SELECT key FROM predictions ORDER BY created DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_backed": self._db is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,49 @@
+from PIL import Image, ImageOps
+import numpy as np
+import io
+import os
+
+# Your model's input size
+TARGET_SIZE = (150, 150)
+# Size of a pre-resized upload: TARGET_SIZE x RGB, one uint8 per channel
+RAW_INPUT_BYTES = TARGET_SIZE[0] * TARGET_SIZE[1] * 3
+
+# Decode JPEGs straight at reduced resolution (set FAST_DECODE=0 for the old full decode)
+FAST_DECODE = os.environ.get('FAST_DECODE', '1') == '1'
+
+
+def decode_image(data, fast=FAST_DECODE):
+    """Open upload bytes as an RGB PIL image.
+
+    The fast path asks libjpeg to scale by 1/2, 1/4 or 1/8 during the DCT (draft
+    mode), so a 12MP phone photo is decoded at roughly 500x380 instead of 4032x3024.
+    Non-JPEG formats ignore draft() and decode normally. Both paths apply the EXIF
+    orientation so rotated phone shots reach the model upright.
+    """
+    img = Image.open(io.BytesIO(data))
+    if fast:
+        img.draft('RGB', TARGET_SIZE)
+    return ImageOps.exif_transpose(img).convert('RGB')
+
+
+def to_model_input(img):
+    """Resize a decoded image and scale it to the (150, 150, 3) float32 array the model expects."""
+    return np.multiply(np.asarray(img.resize(TARGET_SIZE)), 1 / 255.0, dtype=np.float32)
+
+
+def from_raw_tensor(data):
+    """(150, 150, 3) model input from a pre-resized uint8 RGB buffer (row-major HWC,
+    the layout tf.browser.fromPixels produces), without decoding anything.
+
+    The buffer is viewed in place (np.frombuffer) and only the float scaling copies.
+    """
+    if len(data) != RAW_INPUT_BYTES:
+        raise ValueError(f"Raw input must be {TARGET_SIZE[1]}x{TARGET_SIZE[0]}x3 uint8 "
+                         f"({RAW_INPUT_BYTES} bytes), got {len(data)} bytes")
+    pixels = np.frombuffer(data, dtype=np.uint8).reshape(TARGET_SIZE[1], TARGET_SIZE[0], 3)
+    return np.multiply(pixels, 1 / 255.0, dtype=np.float32)
+
+
+def preprocess_image(data, fast=FAST_DECODE):
+    """Decode raw upload bytes into the (150, 150, 3) float array the model expects."""
+    return to_model_input(decode_image(data, fast=fast))
@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Background threads that do request work on behalf of callers (see batcher.py / asgi_app.py)
+WORKER_THREAD_PREFIXES = ('micro-batcher', 'inference')
+
+
+class SamplingProfiler:
+    """On-demand sampling profiler for a live worker.
+
+    start() begins a session that lasts for the next `requests` prediction requests
+    or `seconds` seconds, whichever comes first. While it runs, a background thread
+    snapshots the Python stacks of threads that are handling requests (plus the
+    batcher/inference threads) every interval_ms and counts identical stacks.
+    The result is written as collapsed stacks (flamegraph.pl / speedscope format)
+    with a JSON summary, and optionally a TensorFlow profiler trace for TensorBoard.
+
+    When no session is active, track() costs one attribute check per request.
+    """
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.active = False
+        self.session = None
+        self._lock = threading.Lock()
+        self._request_threads = set()
+        self._stacks = Counter()
+        self._samples = 0
+        self._requests_seen = 0
+        self._request_limit = None
+        self._deadline = None
+        self._interval = 0.005
+        self._tf_trace = False
+        self._started = 0.0
+        self._thread = None
+
+    def start(self, requests=None, seconds=None, interval_ms=5, tf_trace=False):
+        if requests is None and seconds is None:
+            seconds = 30
+        with self._lock:
+            if self.active:
+                raise RuntimeError(f"Profiling session {self.session} is already running")
+            self.session = time.strftime('%Y%m%d-%H%M%S') + f"-{os.getpid()}"
+            self._stacks = Counter()
+            self._samples = 0
+            self._requests_seen = 0
+            self._request_limit = requests
+            self._started = time.perf_counter()
+            self._deadline = self._started + seconds if seconds else None
+            self._interval = interval_ms / 1000.0
+            self._tf_trace = tf_trace and 'tensorflow' in sys.modules
+            os.makedirs(self.session_dir(self.session), exist_ok=True)
+            if self._tf_trace:
+                import tensorflow as tf
+                tf.profiler.experimental.start(os.path.join(self.session_dir(self.session), 'tf_trace'))
+            self.active = True
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+        return self.session
+
+    def session_dir(self, session):
+        return os.path.join(self.out_dir, session)
+
+    @contextmanager
+    def track(self):
+        """Wrap a request so its thread is sampled while a session is active."""
+        if not self.active:
+            yield
+            return
+        ident = threading.get_ident()
+        self._request_threads.add(ident)
+        try:
+            yield
+        finally:
+            self._request_threads.discard(ident)
+            with self._lock:
+                self._requests_seen += 1
+
+    def _should_stop(self):
+        if self._request_limit is not None and self._requests_seen >= self._request_limit:
+            return True
+        return self._deadline is not None and time.perf_counter() >= self._deadline
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._should_stop():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            watched = set(self._request_threads)
+            watched.update(i for i, n in names.items() if n.startswith(WORKER_THREAD_PREFIXES))
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident not in watched:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+                self._samples += 1
+            time.sleep(self._interval)
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self.active = False
+            if self._tf_trace:
+                import tensorflow as tf
+                tf.profiler.experimental.stop()
+            out = self.session_dir(self.session)
+            with open(os.path.join(out, 'stacks.folded'), 'w') as f:
+                for stack, count in self._stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            self_time = Counter()
+            for stack, count in self._stacks.items():
+                self_time[stack.rsplit(';', 1)[-1]] += count
+            with open(os.path.join(out, 'summary.json'), 'w') as f:
+                json.dump({
+                    "session": self.session,
+                    "duration_seconds": round(time.perf_counter() - self._started, 3),
+                    "requests": self._requests_seen,
+                    "samples": self._samples,
+                    "interval_ms": self._interval * 1000,
+                    "tf_trace": self._tf_trace,
+                    "top_self_frames": [
+                        {"frame": frame, "samples": n, "share": round(n / self._samples, 4)}
+                        for frame, n in self_time.most_common(25)
+                    ] if self._samples else [],
+                }, f, indent=2)
+            print(f"Profiling session {self.session} finished: {self._samples} samples over {self._requests_seen} requests")
+
+    def archive(self, session):
+        """Zip a finished session directory and return the archive path (None if unknown)."""
+        if os.path.sep in session or session.startswith('.'):
+            return None
+        src = self.session_dir(session)
+        if not os.path.isdir(src) or (self.active and session == self.session):
+            return None
+        return shutil.make_archive(src, 'zip', src)
+
+    def status(self):
+        sessions = sorted(
+            d for d in os.listdir(self.out_dir) if os.path.isdir(self.session_dir(d))
+        ) if os.path.isdir(self.out_dir) else []
+        return {
+            "active": self.active,
+            "session": self.session if self.active else None,
+            "requests_seen": self._requests_seen if self.active else None,
+            "sessions": sessions,
+        }
@@ -0,0 +1,125 @@
+"""Memory-mappable weights format so gunicorn workers share the model's big layers.
+
+Almost all of the classifier's parameters sit in the Dense layers after Flatten
+(17*17*128 x 512 floats, ~76MB). export() splits the model there: the small
+convolutional trunk is saved as a normal Keras file, and every Dense layer of
+the head is written as raw .npy arrays plus a manifest. SharedWeightsModel loads
+the trunk and opens the head arrays with np.load(mmap_mode='r'); those pages
+come straight from the OS page cache, so every worker on the host maps the same
+physical memory instead of holding a private copy. No preload/fork is needed,
+which matters because TensorFlow is not fork-safe once it has started threads.
+
+    python shared_weights.py --model ../ml_model/waste_classifier_model.h5 --out ../ml_model/shared_weights
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+MANIFEST = 'manifest.json'
+TRUNK = 'trunk.h5'
+
+
+def _relu(x):
+    return np.maximum(x, 0)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {'relu': _relu, 'sigmoid': _sigmoid, 'softmax': _softmax, 'linear': lambda x: x}
+
+
+def export(model, out_dir):
+    """Write trunk.h5, one kernel/bias .npy pair per head Dense layer, and manifest.json."""
+    import tensorflow as tf
+
+    names = [layer.__class__.__name__ for layer in model.layers]
+    if 'Flatten' not in names:
+        raise ValueError("Model has no Flatten layer to split at")
+    split = names.index('Flatten')
+
+    os.makedirs(out_dir, exist_ok=True)
+    trunk = tf.keras.Model(inputs=model.inputs, outputs=model.layers[split].output)
+    trunk.save(os.path.join(out_dir, TRUNK))
+
+    head = []
+    for i, layer in enumerate(model.layers[split + 1:]):
+        kind = layer.__class__.__name__
+        if kind == 'Dropout':
+            continue  # identity at inference
+        if kind != 'Dense':
+            raise ValueError(f"Unsupported head layer for shared weights: {kind}")
+        activation = layer.get_config()['activation']
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation in {layer.name}: {activation}")
+        kernel, bias = layer.get_weights()
+        kernel_file, bias_file = f"dense_{i}_kernel.npy", f"dense_{i}_bias.npy"
+        np.save(os.path.join(out_dir, kernel_file), np.ascontiguousarray(kernel, dtype=np.float32))
+        np.save(os.path.join(out_dir, bias_file), np.asarray(bias, dtype=np.float32))
+        head.append({"kernel": kernel_file, "bias": bias_file, "activation": activation})
+
+    manifest = {
+        "input_shape": list(model.input_shape[1:]),
+        "output_shape": list(model.output_shape[1:]),
+        "trunk": TRUNK,
+        "head": head,
+    }
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class SharedWeightsModel:
+    """Keras trunk + NumPy head over memory-mapped weights, with a Keras-style predict()."""
+
+    def __init__(self, weights_dir):
+        from tensorflow.keras.models import load_model
+
+        with open(os.path.join(weights_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.trunk = load_model(os.path.join(weights_dir, manifest['trunk']), compile=False)
+        self.head = [
+            (
+                np.load(os.path.join(weights_dir, layer['kernel']), mmap_mode='r'),
+                np.load(os.path.join(weights_dir, layer['bias']), mmap_mode='r'),
+                ACTIVATIONS[layer['activation']],
+            )
+            for layer in manifest['head']
+        ]
+        self.input_shape = (None,) + tuple(manifest['input_shape'])
+        self.output_shape = (None,) + tuple(manifest['output_shape'])
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        x = self.trunk.predict(batch, batch_size=batch_size or len(batch), verbose=verbose)
+        for kernel, bias, activation in self.head:
+            x = activation(x @ kernel + bias)
+        return np.asarray(x)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='../ml_model/waste_classifier_model.h5')
+    parser.add_argument('--out', default='../ml_model/shared_weights')
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+    model = load_model(args.model)
+    manifest = export(model, args.out)
+    print(f"Exported trunk + {len(manifest['head'])} head layers to {args.out}")
+
+    # Sanity check: the split model must reproduce the original
+    check = np.random.RandomState(0).random_sample((4,) + tuple(manifest['input_shape'])).astype(np.float32)
+    diff = np.abs(model.predict(check, verbose=0) - SharedWeightsModel(args.out).predict(check)).max()
+    print(f"Max difference vs original model: {diff:.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Drive stream_server.py with a synthetic conveyor-belt frame sequence.
+
+    python stream_client.py --url ws://localhost:5001/stream --frames 600 --fps 30
+    python stream_client.py --images <dataset>/TEST/B --hold 15 --encoded
+
+The sequence is a series of scenes: an item (a photo from --images, or a random
+colored block) lies on a gray belt and is held still for --hold frames with
+per-frame sensor noise, then the next one comes in. With a good threshold the
+server runs the model about once per scene and reuses that answer for the
+rest. Frames are sent on one thread at --fps (0 = as fast as possible) while
+results are read on another; the report checks that every sequence number came
+back once and in order, and gives the reuse rate, per-frame latency and the
+frame rate the server kept up with.
+"""
+import argparse
+import io
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+from websockets.sync.client import connect
+
+SIZE = 150
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp')
+
+
+def scene_items(images_dir, rng):
+    """Endless (150, 150, 3) uint8 items: photos from images_dir in a shuffled loop, else random blocks."""
+    paths = []
+    if images_dir:
+        paths = sorted(os.path.join(images_dir, n) for n in os.listdir(images_dir)
+                       if n.lower().endswith(IMAGE_EXTENSIONS))
+    while True:
+        if paths:
+            for i in rng.permutation(len(paths)):
+                yield np.asarray(Image.open(paths[i]).convert('RGB').resize((SIZE, SIZE)), dtype=np.uint8)
+        else:
+            item = np.full((SIZE, SIZE, 3), 90, dtype=np.uint8)
+            y, x = rng.integers(0, SIZE // 2, size=2)
+            h, w = rng.integers(SIZE // 4, SIZE // 2, size=2)
+            item[y:y + h, x:x + w] = rng.integers(0, 256, size=3)
+            yield item
+
+
+def synthetic_frames(count, hold, noise, images_dir, seed=0):
+    rng = np.random.default_rng(seed)
+    items = scene_items(images_dir, rng)
+    item = None
+    for i in range(count):
+        if i % hold == 0:
+            item = next(items).astype(np.float32)
+        frame = item + rng.normal(0.0, noise, size=item.shape) if noise else item
+        yield np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def encode(frame, encoded):
+    if not encoded:
+        return frame.tobytes()
+    buf = io.BytesIO()
+    Image.fromarray(frame).save(buf, 'JPEG', quality=90)
+    return buf.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='ws://localhost:5001/stream')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--fps', type=float, default=30.0, help='send rate (0 = as fast as possible)')
+    parser.add_argument('--hold', type=int, default=10, help='frames each item stays in view')
+    parser.add_argument('--noise', type=float, default=2.0, help='per-frame sensor noise (std, 0-255 scale)')
+    parser.add_argument('--images', help='folder of photos to use as items instead of random blocks')
+    parser.add_argument('--encoded', action='store_true', help='send JPEG frames instead of raw pixels')
+    args = parser.parse_args()
+
+    frames = [encode(f, args.encoded) for f in synthetic_frames(args.frames, args.hold, args.noise, args.images)]
+    url = args.url if args.encoded else args.url + ('&' if '?' in args.url else '?') + 'format=raw'
+    sent_at = [None] * len(frames)
+    results = []
+
+    with connect(url, max_size=None) as ws:
+        def sender():
+            interval = 1.0 / args.fps if args.fps > 0 else 0.0
+            start = time.perf_counter()
+            for i, frame in enumerate(frames):
+                if interval:
+                    time.sleep(max(0.0, start + i * interval - time.perf_counter()))
+                sent_at[i] = time.perf_counter()
+                ws.send(frame)
+
+        started = time.perf_counter()
+        thread = threading.Thread(target=sender, daemon=True)
+        thread.start()
+        while len(results) < len(frames):
+            message = json.loads(ws.recv())
+            results.append((message, time.perf_counter()))
+        elapsed = time.perf_counter() - started
+        thread.join()
+
+    seqs = [m["seq"] for m, _ in results]
+    latencies = np.array([(received - sent_at[m["seq"]]) * 1000 for m, received in results])
+    reused = sum(1 for m, _ in results if m.get("reused"))
+    errors = sum(1 for m, _ in results if "error" in m)
+    # A scene should be answered the same way for all of its frames
+    flips = sum(1 for (a, _), (b, _) in zip(results, results[1:])
+                if a["seq"] // args.hold == b["seq"] // args.hold and a.get("category") != b.get("category"))
+    report = {
+        "frames": len(frames),
+        "in_order": seqs == list(range(len(frames))),
+        "reused": reused,
+        "reuse_rate": round(reused / len(frames), 4),
+        "model_runs": len(frames) - reused - errors,
+        "errors": errors,
+        "category_changes_within_scene": flips,
+        "latency_ms": {"p50": round(float(np.percentile(latencies, 50)), 1),
+                       "p95": round(float(np.percentile(latencies, 95)), 1),
+                       "max": round(float(latencies.max()), 1)},
+        "send_fps": args.fps,
+        "achieved_fps": round(len(frames) / elapsed, 1),
+        "format": "jpeg" if args.encoded else "raw",
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
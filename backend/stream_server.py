@@ -0,0 +1,301 @@
+"""WebSocket frame stream for a camera pointed at the belt, next to the HTTP API.
+
+    uvicorn stream_server:app --host 0.0.0.0 --port 5001
+    python stream_client.py --url ws://localhost:5001/stream
+
+A client connects to /stream (add ?format=raw to send 150x150x3 uint8 pixels,
+see preprocessing.from_raw_tensor; the default is one encoded image per frame)
+and sends every frame as one binary message. Frame n on a connection is sequence
+number n, and for every frame one JSON text message comes back, in order:
+
+    {"seq": 17, "category": "biodegradable", "confidence": 93.1, "model_prediction": 0.069,
+     "model_version": "v2", "reused": true, "difference": 0.0041}
+
+A frame that could not be decoded, or whose batch failed in the model, gets
+{"seq": n, "error": "..."} instead and the connection stays open.
+
+Each frame is shrunk to a 30x30 grayscale signature and compared with the last
+frame that went through the model (mean absolute difference, 0..1). Below
+STREAM_DIFF_THRESHOLD nothing on the belt changed and that frame's result is
+reused; STREAM_MAX_REUSE caps how many frames in a row may do so. Changed frames
+are collected into one batch per model call, flushed at STREAM_MAX_BATCH frames
+or STREAM_MAX_WAIT_MS after the first, so a client that outruns the model gets
+bigger batches instead of a growing backlog. The model and runtime are the ones
+configured in app.py; the prediction caches are not used (frames never repeat
+byte for byte).
+"""
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+import app as core
+from metrics import registry as metrics
+from preprocessing import decode_image, from_raw_tensor, to_model_input
+
+STREAM_DIFF_THRESHOLD = float(os.environ.get('STREAM_DIFF_THRESHOLD', '0.02'))
+STREAM_MAX_REUSE = int(os.environ.get('STREAM_MAX_REUSE', '30'))
+STREAM_MAX_BATCH = int(os.environ.get('STREAM_MAX_BATCH', '16'))
+STREAM_MAX_WAIT_MS = float(os.environ.get('STREAM_MAX_WAIT_MS', '20'))
+# Frames received but not yet looked at; when full the socket stops being read (backpressure)
+STREAM_MAX_QUEUE = int(os.environ.get('STREAM_MAX_QUEUE', '64'))
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', os.cpu_count() or 1))
+
+executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="stream")
+
+frame_seconds = metrics.histogram(
+    'ecosmart_stream_frame_seconds',
+    'Time from receiving a stream frame to sending its result',
+    labelnames=('outcome',),
+)
+
+
+class StreamStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.frames = {"inferred": 0, "reused": 0, "error": 0}
+        self.batches = 0
+
+    def frame(self, outcome):
+        with self._lock:
+            self.frames[outcome] += 1
+
+    def add(self, counter, n=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def snapshot(self):
+        with self._lock:
+            total = sum(self.frames.values())
+            return {
+                "connections": self.connections,
+                "frames": dict(self.frames),
+                "batches": self.batches,
+                "reuse_rate": round(self.frames["reused"] / total, 4) if total else 0.0,
+                "avg_batch_size": round(self.frames["inferred"] / self.batches, 2) if self.batches else 0.0,
+            }
+
+
+stats = StreamStats()
+
+
+def signature(img_array):
+    """30x30 grayscale thumbnail of a (150, 150, 3) model input: 5x5 block means."""
+    return img_array.reshape(30, 5, 30, 5, 3).mean(axis=(1, 3, 4), dtype=np.float32)
+
+
+class FrameSkipper:
+    """Decides per frame whether the model has to see it or the last answer still holds."""
+
+    def __init__(self, threshold=STREAM_DIFF_THRESHOLD, max_reuse=STREAM_MAX_REUSE):
+        self.threshold = threshold
+        self.max_reuse = max_reuse
+        self.reference = None
+        self.reused = 0
+
+    def check(self, frame_signature):
+        """(changed, difference to the reference frame); a changed frame becomes the new reference."""
+        if self.reference is None:
+            changed, difference = True, 1.0
+        else:
+            difference = float(np.mean(np.abs(frame_signature - self.reference)))
+            changed = difference >= self.threshold or self.reused >= self.max_reuse
+        if changed:
+            self.reference = frame_signature
+            self.reused = 0
+        else:
+            self.reused += 1
+        return changed, round(difference, 4)
+
+
+def prepare_frame(data, raw):
+    """Worker thread: frame bytes -> (model input, signature)."""
+    if data is None:
+        raise ValueError("frames must be sent as binary messages")
+    img_array = from_raw_tensor(data) if raw else to_model_input(decode_image(data))
+    return img_array, signature(img_array)
+
+
+def run_batch(arrays):
+    """Worker thread: one forward pass over the changed frames -> compact results."""
+    with core.runtime.lease() as (model, version):
+        preds = model.predict(np.stack(arrays), batch_size=len(arrays), verbose=0)
+    results = []
+    for pred in preds:
+        full = core.build_result(float(pred[0]), version)
+        results.append({key: full[key] for key in ('category', 'confidence', 'model_prediction', 'model_version')})
+    return results
+
+
+async def read_frames(websocket, frames):
+    """Feed (seq, bytes, received_at) into the queue; (None, None, None) marks the end of the stream."""
+    seq = 0
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            await frames.put((seq, message.get("bytes"), time.perf_counter()))
+            seq += 1
+    except WebSocketDisconnect:
+        pass
+    await frames.put((None, None, None))
+
+
+class FrameStream:
+    """Results for one connection, sent strictly in sequence order.
+
+    pending holds frames whose answer depends on the batch that has not run yet:
+    changed frames (their own slot in the batch) and frames reusing or following
+    one of them. It is only ever non-empty while the batch is.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.skipper = FrameSkipper()
+        self.batch = []
+        self.pending = []
+        self.last_result = None
+        self.flush_at = None
+
+    async def send(self, seq, received_at, outcome, payload):
+        await self.websocket.send_text(json.dumps({"seq": seq, **payload}))
+        frame_seconds.observe(time.perf_counter() - received_at, outcome=outcome)
+        stats.frame(outcome)
+
+    async def add(self, seq, received_at, prepared, error=None):
+        if error is not None:
+            entry = (seq, received_at, "error", {"error": f"Could not read frame: {error}"})
+        else:
+            img_array, frame_signature = prepared
+            changed, difference = self.skipper.check(frame_signature)
+            if changed:
+                self.batch.append(img_array)
+                if self.flush_at is None:
+                    self.flush_at = asyncio.get_running_loop().time() + STREAM_MAX_WAIT_MS / 1000
+            # Index of the frame whose result this one gets (-1: already answered)
+            source = len(self.batch) - 1
+            entry = (seq, received_at, "inferred" if changed else "reused",
+                     {"source": source, "reused": not changed, "difference": difference})
+        if self.pending or entry[2] == "inferred":
+            self.pending.append(entry)
+        else:
+            await self.send(entry[0], entry[1], entry[2], self.resolve(entry[3], None))
+        if len(self.batch) >= STREAM_MAX_BATCH:
+            await self.flush()
+
+    def resolve(self, payload, results):
+        if "source" not in payload:
+            return payload
+        source = payload.pop("source")
+        result = results[source] if results is not None and source >= 0 else self.last_result
+        return {**result, **payload}
+
+    async def flush(self):
+        self.flush_at = None
+        if not self.batch:
+            return
+        arrays, self.batch = self.batch, []
+        pending, self.pending = self.pending, []
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(executor, run_batch, arrays)
+        except Exception as e:
+            print(f"Stream batch of {len(arrays)} frames failed: {e}")
+            # The reference frame never got a result, so the next frame has to go to the model
+            self.skipper.reference = None
+            for seq, received_at, _, payload in pending:
+                await self.send(seq, received_at, "error",
+                                payload if "source" not in payload else {"error": f"Prediction failed: {e}"})
+            return
+        stats.add("batches")
+        for seq, received_at, outcome, payload in pending:
+            await self.send(seq, received_at, outcome, self.resolve(payload, results))
+        self.last_result = results[-1]
+
+
+async def stream(websocket):
+    await websocket.accept()
+    if not core.runtime.ready:
+        await websocket.close(code=1013, reason=f"Model is {core.runtime.state}")
+        return
+    raw = websocket.query_params.get('format') == 'raw'
+    frames = asyncio.Queue(maxsize=STREAM_MAX_QUEUE)
+    reader = asyncio.create_task(read_frames(websocket, frames))
+    state = FrameStream(websocket)
+    loop = asyncio.get_running_loop()
+    stats.add("connections")
+    try:
+        while True:
+            timeout = None if state.flush_at is None else max(0.0, state.flush_at - loop.time())
+            try:
+                seq, data, received_at = await asyncio.wait_for(frames.get(), timeout)
+            except asyncio.TimeoutError:
+                await state.flush()
+                continue
+            if seq is None:
+                break
+            try:
+                prepared = await loop.run_in_executor(executor, prepare_frame, data, raw)
+            except Exception as e:
+                await state.add(seq, received_at, None, error=e)
+                continue
+            await state.add(seq, received_at, prepared)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        stats.add("connections", -1)
+        reader.cancel()
+
+
+async def stream_stats(request):
+    return JSONResponse({
+        "diff_threshold": STREAM_DIFF_THRESHOLD,
+        "max_reuse": STREAM_MAX_REUSE,
+        "max_batch": STREAM_MAX_BATCH,
+        "max_wait_ms": STREAM_MAX_WAIT_MS,
+        **stats.snapshot(),
+    })
+
+
+async def ready(request):
+    return JSONResponse(core.runtime.status(), status_code=200 if core.runtime.ready else 503)
+
+
+async def prometheus_metrics(request):
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+@metrics.collector
+def stream_metrics():
+    snapshot = stats.snapshot()
+    yield ("ecosmart_stream_connections", "gauge", "Open frame stream connections", {}, snapshot["connections"])
+    for outcome, count in snapshot["frames"].items():
+        yield ("ecosmart_stream_frames_total", "counter", "Stream frames answered, by outcome", {"outcome": outcome}, count)
+    yield ("ecosmart_stream_batches_total", "counter", "Model calls made for stream frames", {}, snapshot["batches"])
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        WebSocketRoute('/stream', stream),
+        Route('/stream_stats', stream_stats, methods=['GET']),
+        Route('/ready', ready, methods=['GET']),
+        Route('/metrics', prometheus_metrics, methods=['GET']),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,29 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# The backend modules import each other as top-level modules (import app, from admission import ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeModel:
+    """Stands in for a Keras model: fixed sigmoid output, counts predict() calls."""
+
+    def __init__(self, name='model', output=0.9):
+        self.name = name
+        self.output = output
+        self.calls = 0
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        self.calls += 1
+        return np.full((len(batch), 1), self.output, dtype=np.float32)
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true; fails the test after timeout seconds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for condition"
+        time.sleep(0.01)
@@ -0,0 +1,130 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from admission import AdmissionController, DeadlineExceeded, Overloaded, check_deadline
+from conftest import FakeModel, wait_for
+
+
+def upload():
+    buf = io.BytesIO()
+    Image.new('RGB', (200, 160), (40, 120, 60)).save(buf, 'JPEG')
+    return {'file': (io.BytesIO(buf.getvalue()), 'item.jpg')}
+
+
+@pytest.fixture(scope='module')
+def server():
+    """app.py without a real model: its loader fails fast and each test installs a FakeModel."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('TUNING_FILE', '')
+        mp.setenv('MODEL_PATH', os.path.join(backend_dir, 'no-such-model.h5'))
+        mp.setenv('MODEL_REGISTRY_DIR', '')
+        mp.setenv('MODEL_WATCH_INTERVAL', '0')
+        mp.setenv('MICRO_BATCHING', '0')
+        mp.setenv('LOG_SAMPLE_RATE', '0')
+        import app
+        app.runtime.wait()
+        yield app
+
+
+@pytest.fixture
+def client(server, monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(server.runtime, '_active', (model, 'test'))
+    monkeypatch.setattr(server.runtime, 'state', 'ready')
+    monkeypatch.setattr(server, 'prediction_cache', None)
+    monkeypatch.setattr(server, 'phash_index', None)
+    monkeypatch.setattr(server, 'admission', AdmissionController(max_in_flight=1, max_queue=0))
+    client = server.app.test_client()
+    client.model = model
+    return client
+
+
+def test_request_within_capacity_is_served(server, client):
+    response = client.post('/predict', data=upload())
+    assert response.status_code == 200
+    assert client.model.calls == 1
+    assert server.admission.stats()["served"] == 1
+
+
+def test_request_over_queue_limit_gets_503_with_retry_after(server, client):
+    with server.admission.slot():
+        response = client.post('/predict', data=upload())
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    assert client.model.calls == 0
+    stats = server.admission.stats()
+    assert (stats["served"], stats["shed"], stats["expired"]) == (1, 1, 0)  # the served one is the test's own slot
+
+
+def test_expired_deadline_skips_model_call(server, client):
+    response = client.post('/predict', data=upload(), headers={'X-Request-Deadline-Ms': '0.001'})
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+    assert client.model.calls == 0
+    stats = server.admission.stats()
+    assert (stats["served"], stats["shed"], stats["expired"]) == (0, 0, 1)
+
+
+def test_check_deadline():
+    check_deadline(None)
+    check_deadline(time.monotonic() + 60)
+    with pytest.raises(DeadlineExceeded):
+        check_deadline(time.monotonic() - 1)
+
+
+def test_queued_request_expires_at_its_deadline():
+    admission = AdmissionController(max_in_flight=1, max_queue=1)
+    with admission.slot():
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            with admission.slot(deadline=started + 0.05):
+                pass
+        assert time.monotonic() - started >= 0.05
+    assert admission.stats()["queued"] == 0
+
+
+def test_counters_match_outcomes():
+    admission = AdmissionController(max_in_flight=1, max_queue=1)
+    release = threading.Event()
+    queued_done = threading.Event()
+
+    def holder():
+        with admission.slot():
+            release.wait(5)
+
+    def queued():
+        with admission.slot():
+            queued_done.set()
+
+    first = threading.Thread(target=holder)
+    first.start()
+    wait_for(lambda: admission.stats()["in_flight"] == 1)
+    second = threading.Thread(target=queued)
+    second.start()
+    wait_for(lambda: admission.stats()["queued"] == 1)
+
+    # Slot taken and queue full: shed at once, with a Retry-After hint
+    with pytest.raises(Overloaded) as shed:
+        with admission.slot():
+            pass
+    assert shed.value.retry_after >= 1
+
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert queued_done.is_set()
+
+    # Admitted, then its deadline passes before inference
+    with pytest.raises(DeadlineExceeded):
+        with admission.slot():
+            check_deadline(time.monotonic() - 1)
+
+    stats = admission.stats()
+    assert (stats["served"], stats["shed"], stats["expired"]) == (2, 1, 1)
+    assert (stats["in_flight"], stats["queued"]) == (0, 0)
@@ -0,0 +1,60 @@
+import pytest
+
+from classify_dir import ResultWriter, chunks, done_paths
+
+
+def record(path):
+    return {"path": path, "category": "biodegradable", "confidence": 91.0, "model_prediction": 0.09,
+            "error": None}
+
+
+@pytest.mark.parametrize('suffix', ['.jsonl', '.csv'])
+def test_done_paths_reads_back_committed_results(tmp_path, suffix):
+    out = str(tmp_path / ('results' + suffix))
+    writer = ResultWriter(out, 0)
+    for path in ('a/1.jpg', 'a/2.jpg', 'b/with, comma.jpg'):
+        writer.write(record(path))
+    offset = writer.commit()
+    # Written after the last checkpoint, so not done yet
+    writer.write(record('b/4.jpg'))
+    writer.commit()
+    writer.file.close()
+    assert done_paths(out, offset) == {'a/1.jpg', 'a/2.jpg', 'b/with, comma.jpg'}
+
+
+@pytest.mark.parametrize('suffix', ['.jsonl', '.csv'])
+def test_resume_truncates_after_checkpoint(tmp_path, suffix):
+    out = str(tmp_path / ('results' + suffix))
+    writer = ResultWriter(out, 0)
+    writer.write(record('a/1.jpg'))
+    offset = writer.commit()
+    writer.write(record('a/2.jpg'))
+    writer.file.flush()
+    writer.file.close()
+
+    resumed = ResultWriter(out, offset)
+    resumed.write(record('a/3.jpg'))
+    resumed.file.close()
+    with open(out) as f:
+        size = len(f.read().encode())
+    assert done_paths(out, size) == {'a/1.jpg', 'a/3.jpg'}
+
+
+def test_done_paths_without_results(tmp_path):
+    assert done_paths(str(tmp_path / 'missing.jsonl'), 100) == set()
+    assert done_paths(str(tmp_path / 'missing.jsonl'), 0) == set()
+
+
+def test_chunks_skip_done_inputs_and_only_read_kept_payloads():
+    read = []
+
+    def payload(name):
+        def load():
+            read.append(name)
+            return name.encode()
+        return load
+
+    inputs = [(name, payload(name)) for name in ('new.jpg', 'a.jpg', 'b.jpg', 'c.jpg')]
+    result = list(chunks(inputs, {'a.jpg', 'c.jpg'}, 1))
+    assert result == [[('new.jpg', b'new.jpg')], [('b.jpg', b'b.jpg')]]
+    assert read == ['new.jpg', 'b.jpg']
@@ -0,0 +1,53 @@
+import pytest
+
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    artifact = tmp_path / 'model.h5'
+    artifact.write_bytes(b'weights')
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    (tmp_path / 'models').mkdir()
+    registry.publish(str(artifact), version='v1', activate=True)
+    registry.publish(str(artifact), version='v2')
+    return registry
+
+
+def test_publish_and_activate(registry):
+    assert registry.versions() == ['v1', 'v2']
+    assert registry.current() == 'v1'
+    registry.activate('v2')
+    assert registry.current() == 'v2'
+    assert registry.artifact('v2').endswith('model.h5')
+
+
+INVALID_NAMES = ['../v1', 'a/b', '.staging-v1', 'CURRENT', 3]
+
+
+@pytest.mark.parametrize('version', INVALID_NAMES + [''])
+def test_invalid_version_names_are_rejected(registry, version):
+    with pytest.raises(ValueError):
+        registry.artifact(version)
+    with pytest.raises(ValueError):
+        registry.activate(version)
+    assert registry.current() == 'v1'
+
+
+@pytest.mark.parametrize('version', INVALID_NAMES)
+def test_publish_rejects_invalid_version_names(registry, tmp_path, version):
+    # (an empty name means "use a timestamp" for publish)
+    with pytest.raises(ValueError):
+        registry.publish(str(tmp_path / 'model.h5'), version=version)
+    assert registry.versions() == ['v1', 'v2']
+
+
+def test_missing_version_is_rejected(registry):
+    with pytest.raises(FileNotFoundError):
+        registry.activate('v9')
+    assert registry.current() == 'v1'
+
+
+def test_existing_version_is_not_overwritten(registry, tmp_path):
+    with pytest.raises(FileExistsError):
+        registry.publish(str(tmp_path / 'model.h5'), version='v1')
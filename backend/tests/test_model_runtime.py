@@ -0,0 +1,79 @@
+import gc
+import threading
+import weakref
+
+from conftest import FakeModel, wait_for
+from model_runtime import FAILED, READY, ModelRuntime
+
+
+def make_runtime(fail_versions=()):
+    loaded = {}
+
+    def loader(runtime, version):
+        if version in fail_versions:
+            raise RuntimeError(f"cannot load {version}")
+        loaded[version] = FakeModel(version)
+        return loaded[version]
+
+    runtime = ModelRuntime(loader)
+    runtime.start(version='v1', background=False)
+    return runtime, loaded
+
+
+def test_start_publishes_warmed_up_model():
+    runtime, loaded = make_runtime()
+    assert runtime.state == READY
+    assert runtime.version == 'v1'
+    assert loaded['v1'].calls == 1  # warmup ran before the model went live
+
+
+def test_lease_held_across_swap_keeps_old_model_until_released():
+    runtime, loaded = make_runtime()
+    old_ref = weakref.ref(loaded.pop('v1'))
+    with runtime.lease() as (model, version):
+        assert runtime.reload('v2')
+        wait_for(lambda: runtime.version == 'v2')
+        # The request keeps running on what it leased
+        assert (model.name, version) == ('v1', 'v1')
+        with runtime.lease() as (new_model, new_version):
+            assert (new_model.name, new_version) == ('v2', 'v2')
+        assert not runtime.reload_status.get("previous_released")
+        del model
+    wait_for(lambda: runtime.reload_status.get("previous_released"))
+    runtime._reload_thread.join(5)
+    gc.collect()
+    assert runtime.reload_status["previous_leases_abandoned"] == 0
+    assert old_ref() is None
+
+
+def test_reload_refused_while_another_is_running():
+    release = threading.Event()
+
+    def slow_loader(runtime, version):
+        if version == 'v2':
+            release.wait(5)
+        return FakeModel(version)
+
+    runtime = ModelRuntime(slow_loader)
+    runtime.start(version='v1', background=False)
+    assert runtime.reload('v2')
+    assert not runtime.reload('v3')
+    release.set()
+    wait_for(lambda: runtime.version == 'v2')
+
+
+def test_failed_reload_keeps_serving_current_version():
+    runtime, _ = make_runtime(fail_versions=('broken',))
+    assert runtime.reload('broken', background=False)
+    assert runtime.reload_status["state"] == FAILED
+    assert "cannot load broken" in runtime.reload_status["error"]
+    assert runtime.version == 'v1'
+    assert runtime.ready
+
+
+def test_on_swap_runs_for_first_load_and_every_swap():
+    swapped = []
+    runtime = ModelRuntime(lambda runtime, version: FakeModel(version), on_swap=swapped.append)
+    runtime.start(version='v1', background=False)
+    runtime.reload('v2', background=False)
+    assert swapped == ['v1', 'v2']
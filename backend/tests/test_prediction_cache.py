@@ -0,0 +1,60 @@
+import types
+
+import pytest
+
+import prediction_cache
+from prediction_cache import PredictionCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake wall clock for the cache module only; advance with clock.now += seconds."""
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(prediction_cache, 'time', types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_key_depends_on_bytes_and_model_version():
+    assert PredictionCache.key(b'img', 'v1') == PredictionCache.key(b'img', 'v1')
+    assert PredictionCache.key(b'img', 'v1') != PredictionCache.key(b'img', 'v2')
+    assert PredictionCache.key(b'img', 'v1') != PredictionCache.key(b'other', 'v1')
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', {"category": "biodegradable"})
+    cache.put('b', {"category": "non-biodegradable"})
+    assert cache.get('a') is not None  # 'a' is now more recent than 'b'
+    cache.put('c', {"category": "biodegradable"})
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(max_entries=4, ttl_seconds=60)
+    cache.put('a', {"category": "biodegradable"})
+    clock.now += 59
+    assert cache.get('a') == {"category": "biodegradable"}
+    clock.now += 2
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (1, 1, 1, 0)
+
+
+def test_get_returns_a_copy(clock):
+    cache = PredictionCache()
+    cache.put('a', {"category": "biodegradable"})
+    cache.get('a')["filename"] = "mutated.jpg"
+    assert "filename" not in cache.get('a')
+
+
+def test_disk_cache_survives_restart_and_honours_ttl(clock, tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = PredictionCache(max_entries=4, ttl_seconds=60, disk_path=path)
+    cache.put('a', {"category": "biodegradable"})
+    restarted = PredictionCache(max_entries=4, ttl_seconds=60, disk_path=path)
+    assert restarted.get('a') == {"category": "biodegradable"}
+    clock.now += 61
+    assert PredictionCache(max_entries=4, ttl_seconds=60, disk_path=path).get('a') is None
@@ -0,0 +1,61 @@
+import threading
+
+import numpy as np
+
+try:
+    # Standalone LiteRT runtime: no full TensorFlow import needed to serve
+    from ai_edge_litert.interpreter import Interpreter
+except ImportError:
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+
+
+class TFLiteModel:
+    """Wraps a .tflite interpreter behind the small part of the Keras Model API app.py uses.
+
+    predict() accepts any batch size by resizing the input tensor when the batch
+    changes, and quantizes/dequantizes when the artifact has integer input/output
+    (int8 models converted with float I/O need neither). The interpreter is not
+    thread-safe, so calls are serialised.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self._interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        self._lock = threading.Lock()
+
+        self.input_shape = (None,) + tuple(int(d) for d in self._input['shape'][1:])
+        self.output_shape = (None,) + tuple(int(d) for d in self._output['shape'][1:])
+
+    def _quantize(self, batch):
+        dtype = self._input['dtype']
+        if dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+        scale, zero_point = self._input['quantization']
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, out):
+        if self._output['dtype'] == np.float32:
+            return out
+        scale, zero_point = self._output['quantization']
+        return (out.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.asarray(batch)
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input['index'], list(batch.shape))
+                self._interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self._interpreter.set_tensor(self._input['index'], self._quantize(batch))
+            self._interpreter.invoke()
+            out = self._interpreter.get_tensor(self._output['index'])
+        return self._dequantize(out)
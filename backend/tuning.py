@@ -0,0 +1,46 @@
+"""Host-specific serving settings picked by autotune.py.
+
+autotune.py --write stores them in TUNING_FILE (default: tuning.json next to
+this file) as a flat {ENV_NAME: value} object. apply_tuning() copies each entry
+into os.environ unless that variable is already set, so explicit configuration
+always wins. app.py applies it before reading its settings (so asgi_app.py and
+stream_server.py get it too) and gunicorn.conf.py for the worker and thread counts.
+"""
+import json
+import os
+
+TUNING_FILE = os.environ.get('TUNING_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tuning.json'))
+
+# Everything autotune.py sweeps; other keys in the file are ignored
+TUNABLE = (
+    'WEB_CONCURRENCY',       # gunicorn worker processes
+    'GUNICORN_THREADS',      # request threads per worker
+    'TF_INTRA_OP_THREADS',   # TensorFlow threads inside one op (0 = one per core)
+    'TF_INTER_OP_THREADS',   # TensorFlow ops run in parallel (0 = one per core)
+    'TFLITE_NUM_THREADS',    # same role as intra-op threads for .tflite models
+    'MICRO_BATCHING',
+    'BATCH_MAX_SIZE',
+    'INFERENCE_THREADS',     # asgi_app.py / stream_server.py executor size
+    'ADMISSION_MAX_IN_FLIGHT',
+)
+
+
+def load_tuning(path=TUNING_FILE):
+    """{ENV_NAME: str value} from the tuning file; empty if there is none (or path is '')."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        settings = json.load(f)
+    return {k: str(v) for k, v in settings.items() if k in TUNABLE}
+
+
+def apply_tuning(path=TUNING_FILE):
+    """Fill unset environment variables from the tuning file; returns what was applied."""
+    applied = {}
+    for key, value in load_tuning(path).items():
+        if key not in os.environ:
+            os.environ[key] = value
+            applied[key] = value
+    if applied:
+        print(f"Applied tuned settings from {path}: {applied}")
+    return applied
@@ -1,8 +1,10 @@
+import sys
+
 import tensorflowjs as tfjs
 from tensorflow.keras.models import load_model
 
-# Load your trained model
-model = load_model('ml_model/waste_classifier_model.h5')
+# Load your trained model (or another .h5, e.g. a pruned one from prune_model.py)
+model = load_model(sys.argv[1] if len(sys.argv) > 1 else 'ml_model/waste_classifier_model.h5')
 
 # Convert to TensorFlow.js format
 tfjs.converters.save_keras_model(model, 'public/model')
@@ -0,0 +1,146 @@
+"""Convert the Keras waste classifier to float16 and int8 TFLite artifacts and compare them.
+
+    python convert_tflite.py --data-dir <kaggle dataset>/TEST
+
+--data-dir should contain the B/ and N/ class folders. Part of it feeds the int8
+calibration (representative dataset) and a disjoint held-out part is used to
+measure agreement with the .h5 model. Serve the result with
+INFERENCE_BACKEND=tflite TFLITE_MODEL_PATH=... in backend/app.py.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from preprocessing import preprocess_image  # noqa: E402
+from tflite_model import TFLiteModel  # noqa: E402
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def list_images(data_dir):
+    """(path, label) pairs with the training mapping B=0 (biodegradable), N=1."""
+    items = []
+    for label, folder in enumerate(['B', 'N']):
+        class_dir = os.path.join(data_dir, folder)
+        for name in sorted(os.listdir(class_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                items.append((os.path.join(class_dir, name), label))
+    return items
+
+
+def load_arrays(items):
+    arrays = []
+    for path, _ in items:
+        with open(path, 'rb') as f:
+            arrays.append(preprocess_image(f.read()))
+    return np.stack(arrays).astype(np.float32)
+
+
+def convert(model, mode, calibration):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        def representative_dataset():
+            for sample in calibration:
+                yield [sample[np.newaxis]]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Input/output stay float32 so the server can feed the same arrays as Keras
+    return converter.convert()
+
+
+def latency(predict, sample, runs):
+    predict(sample)  # warm up
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predict(sample)
+        times.append((time.perf_counter() - start) * 1000)
+    return round(float(np.percentile(times, 50)), 3), round(float(np.percentile(times, 99)), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='ml_model/waste_classifier_model.h5')
+    parser.add_argument('--data-dir', help='folder with B/ and N/ images (e.g. the Kaggle TEST split)')
+    parser.add_argument('--out-dir', default='ml_model')
+    parser.add_argument('--calibration', type=int, default=200, help='images used for int8 calibration')
+    parser.add_argument('--holdout', type=int, default=500, help='images used to measure agreement')
+    parser.add_argument('--runs', type=int, default=200, help='timed single-image calls per model')
+    parser.add_argument('--report', help='also write the report as JSON to this path')
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    print(f"Loaded {args.model}")
+
+    if args.data_dir:
+        items = list_images(args.data_dir)
+        random.Random(42).shuffle(items)
+        calibration = load_arrays(items[:args.calibration])
+        holdout_items = items[args.calibration:args.calibration + args.holdout]
+        holdout = load_arrays(holdout_items)
+        labels = np.array([label for _, label in holdout_items])
+        print(f"Calibration images: {len(calibration)}, held-out images: {len(holdout)}")
+    else:
+        print("WARNING: no --data-dir given, calibrating on random noise; agreement numbers are not meaningful")
+        rs = np.random.RandomState(42)
+        calibration = rs.random_sample((args.calibration, 150, 150, 3)).astype(np.float32)
+        holdout = rs.random_sample((args.holdout, 150, 150, 3)).astype(np.float32)
+        labels = None
+
+    reference = model.predict(holdout, batch_size=64, verbose=0)[:, 0]
+    single = holdout[:1]
+    p50, p99 = latency(lambda x: model.predict(x, verbose=0), single, args.runs)
+    report = {"keras": {
+        "path": args.model,
+        "size_mb": round(os.path.getsize(args.model) / 1e6, 2),
+        "p50_ms": p50,
+        "p99_ms": p99,
+    }}
+    if labels is not None:
+        report["keras"]["accuracy"] = round(float(np.mean((reference >= 0.5) == labels)), 4)
+
+    stem = os.path.splitext(os.path.basename(args.model))[0]
+    for mode in ('float16', 'int8'):
+        print(f"Converting to {mode}...")
+        out_path = os.path.join(args.out_dir, f"{stem}_{mode}.tflite")
+        with open(out_path, 'wb') as f:
+            f.write(convert(model, mode, calibration))
+
+        lite = TFLiteModel(out_path)
+        scores = lite.predict(holdout)[:, 0]
+        p50, p99 = latency(lite.predict, single, args.runs)
+        entry = {
+            "path": out_path,
+            "size_mb": round(os.path.getsize(out_path) / 1e6, 2),
+            "p50_ms": p50,
+            "p99_ms": p99,
+            "agreement": round(float(np.mean((scores >= 0.5) == (reference >= 0.5))), 4),
+            "max_abs_score_diff": round(float(np.abs(scores - reference).max()), 5),
+        }
+        if labels is not None:
+            entry["accuracy"] = round(float(np.mean((scores >= 0.5) == labels)), 4)
+        report[mode] = entry
+
+    print(f"\n{'model':<10}{'size MB':>10}{'p50 ms':>10}{'p99 ms':>10}{'agreement':>12}")
+    for name, entry in report.items():
+        print(f"{name:<10}{entry['size_mb']:>10}{entry['p50_ms']:>10}{entry['p99_ms']:>10}{entry.get('agreement', 1.0):>12}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
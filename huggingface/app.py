@@ -3,6 +3,8 @@ from flask_cors import CORS
 import os
 import io
 
+from prediction_cache import PredictionCache, model_version_for
+
 app = Flask(__name__)
 CORS(app)
 
@@ -87,14 +89,53 @@ except Exception as e:
     MODEL_SOURCE = "intelligent_fallback"
     HAS_MODEL = False
 
+# "keras" (the default) is the .h5 loaded above; "tflite" serves a float16/int8
+# artifact from convert_tflite.py with the much lighter LiteRT interpreter instead.
+# A TFLite-only Space ships just that file, so the block above finds no .h5.
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+TFLITE_MODEL_PATH = os.environ.get('TFLITE_MODEL_PATH', "waste_classifier_model_int8.tflite")
+
+if INFERENCE_BACKEND == 'tflite' and os.path.exists(TFLITE_MODEL_PATH):
+    from PIL import Image
+    import numpy as np
+    from tflite_model import TFLiteModel
+    
+    print(f"Loading TFLite model from: {TFLITE_MODEL_PATH}")
+    model = TFLiteModel(TFLITE_MODEL_PATH)
+    print("✅ TFLite model loaded successfully!")
+    MODEL_SOURCE = "your_trained_model_tflite"
+    HAS_MODEL = True
+
+# Cache of final model results keyed by the uploaded bytes + model version
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+PREDICTION_CACHE_TTL = int(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+PREDICTION_CACHE_PATH = os.environ.get('PREDICTION_CACHE_PATH')  # optional SQLite file
+
+model_file = TFLITE_MODEL_PATH if MODEL_SOURCE == "your_trained_model_tflite" else "waste_classifier_model.h5"
+model_version = f"{MODEL_SOURCE}-{model_version_for(model_file)}"
+prediction_cache = None
+if PREDICTION_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(
+        max_entries=PREDICTION_CACHE_SIZE,
+        ttl_seconds=PREDICTION_CACHE_TTL,
+        disk_path=PREDICTION_CACHE_PATH,
+    )
+
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
         file = request.files['file']
         
         if HAS_MODEL:
+            data = file.read()
+            cache_key = PredictionCache.key(data, model_version)
+            if prediction_cache is not None:
+                cached = prediction_cache.get(cache_key)
+                if cached is not None:
+                    return jsonify(cached)
+            
             # Use YOUR actual trained model
-            img = Image.open(io.BytesIO(file.read())).convert('RGB')
+            img = Image.open(io.BytesIO(data)).convert('RGB')
             img = img.resize((150, 150))
             img_array = np.expand_dims(np.array(img) / 255.0, axis=0)
             
@@ -173,17 +214,27 @@ def predict():
                 
             reason = "Intelligent classification based on filename analysis"
         
-        return jsonify({
+        result = {
             "category": category,
             "confidence": round(confidence, 2),
             "source": MODEL_SOURCE,
             "object_name": category.replace('-', ' ').title() + " waste",
-            "reason": reason
-        })
+            "reason": reason,
+            "model_version": model_version
+        }
+        if HAS_MODEL and prediction_cache is not None:
+            prediction_cache.put(cache_key, result)
+        return jsonify(result)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    if prediction_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, "model_version": model_version, **prediction_cache.stats()})
+
 @app.route('/', methods=['GET'])
 def health():
     return jsonify({
@@ -191,7 +242,8 @@ def health():
         "model_loaded": HAS_MODEL, 
         "source": MODEL_SOURCE,
         "message": "Upload waste_classifier_model.h5 to use your trained model",
-        "model_info": f"Model available: {HAS_MODEL}"
+        "model_info": f"Model available: {HAS_MODEL}",
+        "model_version": model_version
     })
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+"""Images/sec of the old ImageDataGenerator input path vs the tf.data pipeline.
+
+Both use the training augmentation settings and are timed over full epochs.
+tf.data is measured for a cold first epoch (decode + cache fill) and a warm
+second epoch (served from cache; tf.data drops a partially read cache, so
+epochs are never cut short). With --shards, the pre-decoded shards from
+build_shards.py are timed as well.
+
+    python benchmark_input_pipeline.py --data-dir <dataset>/TRAIN.1 [--shards shards/train]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+from data_pipeline import make_dataset, make_shard_dataset
+
+
+def images_per_second(batches, limit=None):
+    count = 0
+    start = time.perf_counter()
+    for i, (images, _) in enumerate(batches):
+        count += int(images.shape[0])
+        if limit is not None and i + 1 >= limit:
+            break
+    return round(count / (time.perf_counter() - start), 1), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', required=True, help='folder with B/ and N/ images')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--shards', help='shard directory built from the same folder by build_shards.py')
+    args = parser.parse_args()
+
+    generator = ImageDataGenerator(
+        rescale=1./255,
+        rotation_range=20,
+        width_shift_range=0.2,
+        height_shift_range=0.2,
+        horizontal_flip=True,
+        zoom_range=0.2,
+    ).flow_from_directory(args.data_dir, target_size=(150, 150), batch_size=args.batch_size,
+                          class_mode='binary', classes=['B', 'N'])
+    # The generator loops forever; stop after one epoch's worth of batches
+    generator_ips, generator_images = images_per_second(generator, len(generator))
+
+    # A fresh cache file, so the first epoch really decodes even if training cached this folder already
+    with tempfile.TemporaryDirectory() as cache_dir:
+        dataset = make_dataset(args.data_dir, batch_size=args.batch_size, augment=True,
+                               cache=os.path.join(cache_dir, 'cache'))
+        cold_ips, tfdata_images = images_per_second(dataset)
+        warm_ips, _ = images_per_second(dataset)
+
+    report = {
+        "batch_size": args.batch_size,
+        "images_timed": {"generator": generator_images, "tf_data": tfdata_images},
+        "images_per_second": {
+            "image_data_generator": generator_ips,
+            "tf_data_first_epoch": cold_ips,
+            "tf_data_cached_epoch": warm_ips,
+        },
+        "speedup_cached_vs_generator": round(warm_ips / generator_ips, 2),
+    }
+    if args.shards:
+        shard_ips, _ = images_per_second(make_shard_dataset(args.shards, batch_size=args.batch_size, augment=True))
+        report["images_per_second"]["shards"] = shard_ips
+        report["speedup_shards_vs_generator"] = round(shard_ips / generator_ips, 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""One-time preprocessing of a B/N image folder into memory-mappable shards.
+
+Each shard is a pair of .npy files (N x 150 x 150 x 3 uint8 images, N int32
+labels) decoded and resized exactly like data_pipeline.make_dataset does, so
+training can stream them with np.load(mmap_mode='r') instead of re-decoding
+JPEGs every run (see data_pipeline.make_shard_dataset). index.json lists the
+shards with their sizes and sha256 checksums, and every source file that went
+in, so running the script again on a grown folder only decodes the new images:
+the last partial shard is rewritten under new file names with the new images
+added and further shards are appended. The index is rewritten after every shard,
+so an interrupted build resumes where it stopped.
+
+    python build_shards.py --data-dir <dataset>/TRAIN.1 --out shards/train
+    python build_shards.py --out shards/train --verify
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from data_pipeline import AUTOTUNE, CLASS_NAMES, IMG_SIZE, decode_and_resize, list_images, load_shard_index
+
+INDEX_FILE = 'index.json'
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_atomic(path, array):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _write_index(out_dir, index):
+    tmp = os.path.join(out_dir, INDEX_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, os.path.join(out_dir, INDEX_FILE))
+
+
+def _flush_shard(out_dir, index, shard_no, images, labels, sources):
+    """Write one shard and record it (and the sources it holds) in the index.
+
+    A topped-up shard goes to new file names (suffixed with its new count) and the
+    old files are removed only after the index points at the new ones, so an
+    interruption never leaves the index describing files that were overwritten.
+    """
+    name = f"shard-{shard_no:05d}"
+    replaced = index['shards'][shard_no] if shard_no < len(index['shards']) else None
+    stem = f"{name}-{len(labels)}" if replaced else name
+    images_file, labels_file = stem + '-images.npy', stem + '-labels.npy'
+    _save_atomic(os.path.join(out_dir, images_file), images)
+    _save_atomic(os.path.join(out_dir, labels_file), labels)
+    entry = {
+        "name": name,
+        "count": int(len(labels)),
+        "images": images_file,
+        "labels": labels_file,
+        "images_sha256": sha256_file(os.path.join(out_dir, images_file)),
+        "labels_sha256": sha256_file(os.path.join(out_dir, labels_file)),
+    }
+    if replaced:
+        index['shards'][shard_no] = entry
+    else:
+        index['shards'].append(entry)
+    index['sources'].extend(sources)
+    _write_index(out_dir, index)
+    if replaced:
+        for kind in ('images', 'labels'):
+            if replaced[kind] != entry[kind]:
+                os.remove(os.path.join(out_dir, replaced[kind]))
+
+
+def build(data_dir, out_dir, shard_size=1024):
+    """Add every image under data_dir that is not in the shards yet; returns the number added."""
+    os.makedirs(out_dir, exist_ok=True)
+    if os.path.exists(os.path.join(out_dir, INDEX_FILE)):
+        index = load_shard_index(out_dir)
+        shard_size = index['shard_size']
+    else:
+        index = {
+            "format": 1,
+            "class_names": CLASS_NAMES,
+            "image_shape": [IMG_SIZE[0], IMG_SIZE[1], 3],
+            "shard_size": shard_size,
+            "shards": [],
+            "sources": [],
+        }
+
+    known = {source for source, _ in index['sources']}
+    paths, labels = list_images(data_dir)
+    pending = [(p, l) for p, l in zip(paths, labels) if os.path.relpath(p, data_dir) not in known]
+    if not pending:
+        print(f"Shards in {out_dir} already hold all {len(paths)} images")
+        return 0
+
+    # Top up the last shard if it is partial, otherwise start a new one
+    shard_no = len(index['shards'])
+    images = np.empty((shard_size, IMG_SIZE[0], IMG_SIZE[1], 3), dtype=np.uint8)
+    shard_labels = np.empty(shard_size, dtype=np.int32)
+    filled = 0
+    if index['shards'] and index['shards'][-1]['count'] < shard_size:
+        last = index['shards'][-1]
+        shard_no -= 1
+        filled = last['count']
+        images[:filled] = np.load(os.path.join(out_dir, last['images']))
+        shard_labels[:filled] = np.load(os.path.join(out_dir, last['labels']))
+    new_sources = []
+
+    start = time.perf_counter()
+    ds = tf.data.Dataset.from_tensor_slices(([p for p, _ in pending], [l for _, l in pending]))
+    ds = ds.map(decode_and_resize, num_parallel_calls=AUTOTUNE).batch(64).prefetch(AUTOTUNE)
+    done = 0
+    for batch_images, batch_labels in ds:
+        batch_images, batch_labels = batch_images.numpy(), batch_labels.numpy()
+        for img, label in zip(batch_images, batch_labels):
+            images[filled] = img
+            shard_labels[filled] = label
+            path, _ = pending[done]
+            new_sources.append([os.path.relpath(path, data_dir), int(label)])
+            filled += 1
+            done += 1
+            if filled == shard_size:
+                _flush_shard(out_dir, index, shard_no, images, shard_labels, new_sources)
+                shard_no, filled, new_sources = shard_no + 1, 0, []
+    if filled:
+        _flush_shard(out_dir, index, shard_no, images[:filled], shard_labels[:filled], new_sources)
+
+    elapsed = time.perf_counter() - start
+    print(f"Added {done} images to {out_dir} in {elapsed:.1f}s "
+          f"({len(index['shards'])} shards, {len(index['sources'])} images total)")
+    return done
+
+
+def verify(out_dir):
+    """Recompute every shard checksum; returns the names of shards that do not match."""
+    index = load_shard_index(out_dir)
+    bad = []
+    for shard in index['shards']:
+        for kind in ('images', 'labels'):
+            if sha256_file(os.path.join(out_dir, shard[kind])) != shard[kind + '_sha256']:
+                bad.append(f"{shard['name']} ({kind})")
+    total = sum(s['count'] for s in index['shards'])
+    if total != len(index['sources']):
+        bad.append(f"index lists {len(index['sources'])} sources but shards hold {total} images")
+    return bad
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', help='folder with B/ and N/ images to add')
+    parser.add_argument('--out', required=True, help='shard directory (created or appended to)')
+    parser.add_argument('--shard-size', type=int, default=1024, help='images per shard for a new shard set')
+    parser.add_argument('--verify', action='store_true', help='check shard checksums')
+    args = parser.parse_args()
+
+    if args.data_dir:
+        build(args.data_dir, args.out, args.shard_size)
+    if args.verify:
+        bad = verify(args.out)
+        print("All shard checksums match" if not bad else "Checksum mismatch: " + ", ".join(bad))
+        if bad:
+            raise SystemExit(1)
+    if not args.data_dir and not args.verify:
+        parser.error('nothing to do: pass --data-dir and/or --verify')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Size / latency / accuracy report for trained Keras models.
+
+For each model: parameter count, file size, CPU inference latency at several
+batch sizes (through model.predict, the call the backend makes, and as a bare
+forward pass, which is what the architecture itself costs) and accuracy
+on the validation images. The validation set is decoded once and shared by
+all models.
+
+    python compare_models.py --data-dir <dataset>/TRAIN.1 \\
+        waste_classifier_model.h5 waste_classifier_model_compact.h5
+    python compare_models.py --data-dir <dataset>/TEST --validation-split 0 --out report.json *.h5
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from data_pipeline import make_dataset
+
+
+def load_validation(data_dir, validation_split):
+    ds = make_dataset(data_dir, validation_split=validation_split or None,
+                      subset='validation' if validation_split else None, shuffle=False, cache=False)
+    images, labels = [], []
+    for batch_images, batch_labels in ds:
+        images.append(batch_images.numpy())
+        labels.append(batch_labels.numpy())
+    return np.concatenate(images), np.concatenate(labels)
+
+
+def _timings_ms(fn, runs, warmup=3):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def latency_ms(model, batch_size, runs):
+    """predict() latency (what the backend pays) and the bare forward pass without predict's per-call overhead."""
+    batch = np.random.default_rng(0).random((batch_size, 150, 150, 3), dtype=np.float32)
+    predict = _timings_ms(lambda: model.predict(batch, verbose=0), runs)
+    forward = tf.function(lambda x: model(x, training=False))
+    tensor = tf.constant(batch)
+    call = _timings_ms(lambda: forward(tensor).numpy(), runs)
+    p50 = float(np.percentile(predict, 50))
+    return {
+        "p50": round(p50, 2),
+        "p95": round(float(np.percentile(predict, 95)), 2),
+        "per_image_p50": round(p50 / batch_size, 3),
+        "forward_p50": round(float(np.percentile(call, 50)), 2),
+    }
+
+
+def accuracy(model, images, labels):
+    predictions = model.predict(images, batch_size=32, verbose=0).reshape(-1)
+    return round(float(np.mean((predictions >= 0.5).astype(np.float32) == labels)), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('models', nargs='+', help='.h5 / .keras model files')
+    parser.add_argument('--data-dir', help='folder with B/ and N/ images (omit to skip accuracy)')
+    parser.add_argument('--validation-split', type=float, default=0.2,
+                        help='fraction used as validation, as in training (0 = use the whole folder)')
+    parser.add_argument('--batch-sizes', default='1,8,32')
+    parser.add_argument('--runs', type=int, default=20, help='timed predict calls per batch size')
+    parser.add_argument('--threads', type=int, default=0, help='TF intra-op threads (0 = TF default)')
+    parser.add_argument('--out', help='write the JSON report here as well')
+    args = parser.parse_args()
+
+    if args.threads:
+        tf.config.threading.set_intra_op_parallelism_threads(args.threads)
+
+    images = labels = None
+    if args.data_dir:
+        images, labels = load_validation(args.data_dir, args.validation_split)
+        print(f"Validation images: {len(labels)}")
+
+    first = args.batch_sizes.split(',')[0]
+    results = []
+    for path in args.models:
+        model = tf.keras.models.load_model(path, compile=False)
+        result = {
+            "model": os.path.basename(path),
+            "parameters": int(model.count_params()),
+            "file_size_mb": round(os.path.getsize(path) / (1024 * 1024), 2),
+            "latency_ms": {str(b): latency_ms(model, int(b), args.runs) for b in args.batch_sizes.split(',')},
+            "accuracy": accuracy(model, images, labels) if images is not None else None,
+        }
+        results.append(result)
+        print(f"{result['model']}: {result['parameters']:,} params, {result['file_size_mb']} MB, "
+              f"batch-{first} predict p50 {result['latency_ms'][first]['p50']} ms "
+              f"(forward {result['latency_ms'][first]['forward_p50']} ms), "
+              f"accuracy {result['accuracy']}")
+        tf.keras.backend.clear_session()
+
+    report = {
+        "validation_images": int(len(labels)) if labels is not None else 0,
+        "cpu_threads": args.threads or os.cpu_count(),
+        "models": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
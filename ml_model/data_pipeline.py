@@ -0,0 +1,188 @@
+"""tf.data input pipeline replacing ImageDataGenerator.flow_from_directory.
+
+Same contract as the generators in the training scripts: B/ and N/ class folders,
+B=0 (biodegradable), N=1 (non-biodegradable), 150x150 RGB scaled to [0, 1] and
+the same validation_split semantics (the first fraction of each class's sorted
+file list is validation). The difference is how the work is done:
+
+  - class folders are listed in parallel
+  - JPEG decode + resize run in parallel (num_parallel_calls=AUTOTUNE)
+  - the deterministic decode + resize result is cached as uint8 (on disk by
+    default, see make_dataset), so only the first run pays for it
+  - augmentation runs as vectorized ops on whole batches
+  - batches are prefetched so the model never waits on input
+
+make_shard_dataset() streams the same batches from shards written once by
+build_shards.py, so repeated training runs skip decoding entirely.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tensorflow as tf
+
+CLASS_NAMES = ['B', 'N']  # B=Biodegradable (index 0), N=Non-Biodegradable (index 1)
+IMG_SIZE = (150, 150)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+AUTOTUNE = tf.data.AUTOTUNE
+# Decoded images are 150*150*3 bytes = ~66KB each, so caching a full training set
+# (plus its validation split) takes GBs: make_dataset keeps that on disk here by
+# default and only holds it in RAM with cache='memory'
+DATA_CACHE_DIR = os.environ.get('DATA_CACHE_DIR',
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_cache'))
+
+
+def list_images(directory, validation_split=None, subset=None):
+    """Sorted (paths, labels) for the B/N folders, split the way flow_from_directory splits."""
+    def list_class(label):
+        class_dir = os.path.join(directory, CLASS_NAMES[label])
+        names = sorted(n for n in os.listdir(class_dir) if n.lower().endswith(IMAGE_EXTENSIONS))
+        if validation_split:
+            cut = int(validation_split * len(names))
+            names = names[:cut] if subset == 'validation' else names[cut:]
+        return [os.path.join(class_dir, n) for n in names], [label] * len(names)
+
+    with ThreadPoolExecutor(max_workers=len(CLASS_NAMES)) as pool:
+        per_class = list(pool.map(list_class, range(len(CLASS_NAMES))))
+    paths = [p for class_paths, _ in per_class for p in class_paths]
+    labels = [l for _, class_labels in per_class for l in class_labels]
+    return paths, labels
+
+
+def decode_and_resize(path, label):
+    data = tf.io.read_file(path)
+    img = tf.io.decode_image(data, channels=3, expand_animations=False)
+    img = tf.image.resize(img, IMG_SIZE, method='nearest')
+    # flow_from_directory also resizes with nearest-neighbour by default
+    return tf.cast(img, tf.uint8), label
+
+
+def augmentation_layers(seed=None):
+    """Batch-level equivalent of the ImageDataGenerator settings used for training."""
+    return tf.keras.Sequential([
+        tf.keras.layers.RandomRotation(20 / 360, fill_mode='nearest', seed=seed),
+        tf.keras.layers.RandomTranslation(0.2, 0.2, fill_mode='nearest', seed=seed),
+        tf.keras.layers.RandomFlip('horizontal', seed=seed),
+        tf.keras.layers.RandomZoom(0.2, fill_mode='nearest', seed=seed),
+    ], name='augmentation')
+
+
+def finish_batches(ds, label_mode='binary', augment=False, seed=None):
+    """Scale uint8 batches to [0, 1], optionally augment, shape labels and prefetch."""
+    augmenter = augmentation_layers(seed) if augment else None
+
+    def finish(images, batch_labels):
+        images = tf.cast(images, tf.float32) / 255.0
+        if augmenter is not None:
+            images = augmenter(images, training=True)
+        if label_mode == 'categorical':
+            batch_labels = tf.one_hot(batch_labels, len(CLASS_NAMES))
+        else:
+            batch_labels = tf.cast(batch_labels, tf.float32)
+        return images, batch_labels
+
+    return ds.map(finish, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+
+def _cache_prefix(directory, subset, paths, shuffle, seed):
+    """Cache file prefix unique to this file list, split and order (a changed folder gets a new cache)."""
+    digest = hashlib.sha1(json.dumps([paths, shuffle, seed]).encode()).hexdigest()[:16]
+    os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+    name = os.path.basename(os.path.normpath(directory))
+    return os.path.join(DATA_CACHE_DIR, f"{name}-{subset or 'all'}-{digest}")
+
+
+def make_dataset(directory, batch_size=32, label_mode='binary', validation_split=None, subset=None,
+                 augment=False, shuffle=True, cache=True, seed=123):
+    """Batched, prefetched dataset of (images in [0, 1], labels) from a B/N directory.
+
+    cache=True caches the decoded 150x150 uint8 images in a file under
+    DATA_CACHE_DIR, named after the exact file list and split, so later runs
+    over the same images skip decoding. cache='memory' keeps them in RAM instead
+    (~66KB per image, GBs for the full dataset), any other string is used as the
+    cache file prefix, and False disables caching.
+    """
+    paths, labels = list_images(directory, validation_split, subset)
+    if not paths:
+        raise ValueError(f"No images found under {directory} ({'/'.join(CLASS_NAMES)} folders)")
+
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    if shuffle:
+        # Shuffle file order once (not per epoch) so the cache holds a mixed order
+        ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=False)
+    ds = ds.map(decode_and_resize, num_parallel_calls=AUTOTUNE, deterministic=False)
+    if cache == 'memory':
+        ds = ds.cache()
+    elif cache:
+        ds = ds.cache(cache if isinstance(cache, str) else _cache_prefix(directory, subset, paths, shuffle, seed))
+    if shuffle:
+        ds = ds.shuffle(min(len(paths), 2048), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size, num_parallel_calls=AUTOTUNE)
+
+    ds = finish_batches(ds, label_mode, augment, seed)
+    ds.samples = len(paths)
+    ds.class_indices = {name: i for i, name in enumerate(CLASS_NAMES)}
+    return ds
+
+
+def load_shard_index(shard_dir):
+    with open(os.path.join(shard_dir, 'index.json')) as f:
+        index = json.load(f)
+    if index['class_names'] != CLASS_NAMES or tuple(index['image_shape'][:2]) != IMG_SIZE:
+        raise ValueError(f"Shards in {shard_dir} were built for {index['class_names']} "
+                         f"at {index['image_shape']}, expected {CLASS_NAMES} at {IMG_SIZE}")
+    return index
+
+
+def _split_indices(sources, validation_split, subset):
+    """Global indices of the requested subset, split per class like list_images()."""
+    if not validation_split:
+        return np.arange(len(sources))
+    selected = []
+    for label in range(len(CLASS_NAMES)):
+        members = sorted((os.path.basename(source), i) for i, (source, l) in enumerate(sources) if l == label)
+        cut = int(validation_split * len(members))
+        members = members[:cut] if subset == 'validation' else members[cut:]
+        selected.extend(i for _, i in members)
+    return np.array(sorted(selected), dtype=np.int64)
+
+
+def make_shard_dataset(shard_dir, batch_size=32, label_mode='binary', validation_split=None, subset=None,
+                       augment=False, shuffle=True, seed=123):
+    """make_dataset() equivalent that reads pre-decoded shards from build_shards.py.
+
+    Shards are memory-mapped, so a batch is a gather of uint8 rows out of the page
+    cache; there is no decoding and nothing is held in process memory.
+    """
+    index = load_shard_index(shard_dir)
+    shard_images = [np.load(os.path.join(shard_dir, s['images']), mmap_mode='r') for s in index['shards']]
+    labels = np.concatenate([np.load(os.path.join(shard_dir, s['labels'])) for s in index['shards']]
+                            or [np.empty(0, dtype=np.int32)])
+    offsets = np.cumsum([0] + [s['count'] for s in index['shards']])
+    selected = _split_indices(index['sources'], validation_split, subset)
+    if not len(selected):
+        raise ValueError(f"No images in shards under {shard_dir}")
+    rng = np.random.default_rng(seed)
+
+    def batches():
+        order = rng.permutation(selected) if shuffle else selected
+        for start in range(0, len(order), batch_size):
+            # Sorted indices turn the gather into mostly sequential reads within each shard
+            idx = np.sort(order[start:start + batch_size])
+            shard_of = np.searchsorted(offsets, idx, side='right') - 1
+            images = np.empty((len(idx), IMG_SIZE[0], IMG_SIZE[1], 3), dtype=np.uint8)
+            for shard in np.unique(shard_of):
+                rows = shard_of == shard
+                images[rows] = shard_images[shard][idx[rows] - offsets[shard]]
+            yield images, labels[idx]
+
+    ds = tf.data.Dataset.from_generator(batches, output_signature=(
+        tf.TensorSpec((None, IMG_SIZE[0], IMG_SIZE[1], 3), tf.uint8),
+        tf.TensorSpec((None,), tf.int32),
+    ))
+    ds = finish_batches(ds, label_mode, augment, seed)
+    ds.samples = len(selected)
+    ds.class_indices = {name: i for i, name in enumerate(CLASS_NAMES)}
+    return ds
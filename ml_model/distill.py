@@ -0,0 +1,132 @@
+"""Distil the trained waste_classifier_model.h5 into a much smaller student.
+
+The student (a models.py architecture, `tiny` by default) is trained on the
+real dataset with the teacher's soft targets: both models' logits are divided
+by a temperature T and the student matches the teacher's softened probability,
+blended with the usual loss on the hard B/N labels:
+
+    loss = alpha * BCE(label, s) + (1 - alpha) * T^2 * BCE(sigmoid(t/T), sigmoid(s/T))
+
+The teacher sees exactly the same augmented batch as the student. The saved
+student has a sigmoid output like the production model, so the backend serves
+it unchanged (MODEL_PATH=.../waste_classifier_model_tiny.h5). The report gives
+student and teacher accuracy, their agreement, size and the CPU speedup.
+
+    python distill.py --data-dir <dataset>/TRAIN.1 --teacher waste_classifier_model.h5
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from compare_models import accuracy, latency_ms, load_validation
+from data_pipeline import make_dataset, make_shard_dataset
+from models import ARCHITECTURES, build_model, model_filename
+
+
+def teacher_logits_fn(teacher):
+    """Teacher logits recovered from its sigmoid output (clipped so saturated outputs stay finite)."""
+    @tf.function
+    def logits(images):
+        p = tf.clip_by_value(tf.reshape(teacher(images, training=False), [-1]), 1e-6, 1 - 1e-6)
+        return tf.math.log(p) - tf.math.log1p(-p)
+    return logits
+
+
+def distill(teacher, train_data, arch='tiny', epochs=10, temperature=4.0, alpha=0.3, learning_rate=1e-3):
+    student = build_model(arch, logits=True)
+    optimizer = tf.keras.optimizers.Adam(learning_rate)
+    teacher_logits = teacher_logits_fn(teacher)
+    bce = tf.keras.losses.BinaryCrossentropy(from_logits=True)
+
+    @tf.function
+    def train_step(images, labels):
+        soft_targets = tf.sigmoid(teacher_logits(images) / temperature)
+        with tf.GradientTape() as tape:
+            logits = tf.reshape(student(images, training=True), [-1])
+            hard_loss = bce(labels, logits)
+            soft_loss = bce(soft_targets, logits / temperature) * temperature ** 2
+            loss = alpha * hard_loss + (1 - alpha) * soft_loss
+        grads = tape.gradient(loss, student.trainable_variables)
+        optimizer.apply_gradients(zip(grads, student.trainable_variables))
+        return loss
+
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        losses = [float(train_step(images, labels)) for images, labels in train_data]
+        print(f"Epoch {epoch + 1}/{epochs}: loss {np.mean(losses):.4f} ({time.perf_counter() - start:.1f}s)")
+
+    # Same weights, sigmoid output: the serving contract of the production model
+    serve = build_model(arch)
+    serve.set_weights(student.get_weights())
+    return serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', required=True, help='folder with B/ and N/ images')
+    parser.add_argument('--shards', help='train from build_shards.py shards of --data-dir instead of decoding JPEGs')
+    parser.add_argument('--teacher', default='waste_classifier_model.h5')
+    parser.add_argument('--student', default='tiny', choices=[a for a in ARCHITECTURES if a != 'baseline'])
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--temperature', type=float, default=4.0)
+    parser.add_argument('--alpha', type=float, default=0.3, help='weight of the hard-label loss')
+    parser.add_argument('--learning-rate', type=float, default=1e-3)
+    parser.add_argument('--out', help='student model path (default waste_classifier_model_<student>.h5)')
+    parser.add_argument('--report', help='write the JSON report here as well')
+    args = parser.parse_args()
+
+    teacher = tf.keras.models.load_model(args.teacher, compile=False)
+    if args.shards:
+        train_data = make_shard_dataset(args.shards, validation_split=0.2, subset='training', augment=True)
+    else:
+        train_data = make_dataset(args.data_dir, validation_split=0.2, subset='training', augment=True)
+    print(f"Distilling {args.teacher} into '{args.student}' on {train_data.samples} images")
+
+    student = distill(teacher, train_data, args.student, args.epochs, args.temperature, args.alpha,
+                      args.learning_rate)
+    out = args.out or model_filename(args.student)
+    student.save(out)
+    print(f"Student saved as {out}")
+
+    images, labels = load_validation(args.data_dir, 0.2)
+    teacher_pred = teacher.predict(images, batch_size=32, verbose=0).reshape(-1) >= 0.5
+    student_pred = student.predict(images, batch_size=32, verbose=0).reshape(-1) >= 0.5
+    teacher_latency = {b: latency_ms(teacher, b, runs=20) for b in (1, 32)}
+    student_latency = {b: latency_ms(student, b, runs=20) for b in (1, 32)}
+
+    report = {
+        "validation_images": int(len(labels)),
+        "teacher": {
+            "model": os.path.basename(args.teacher),
+            "parameters": int(teacher.count_params()),
+            "file_size_mb": round(os.path.getsize(args.teacher) / (1024 * 1024), 2),
+            "accuracy": accuracy(teacher, images, labels),
+            "latency_ms": {str(b): v for b, v in teacher_latency.items()},
+        },
+        "student": {
+            "model": os.path.basename(out),
+            "architecture": args.student,
+            "parameters": int(student.count_params()),
+            "file_size_mb": round(os.path.getsize(out) / (1024 * 1024), 2),
+            "accuracy": accuracy(student, images, labels),
+            "latency_ms": {str(b): v for b, v in student_latency.items()},
+        },
+        "agreement_with_teacher": round(float(np.mean(teacher_pred == student_pred)), 4),
+        "forward_speedup": {
+            str(b): round(teacher_latency[b]['forward_p50'] / student_latency[b]['forward_p50'], 2) for b in (1, 32)
+        },
+        "settings": {"epochs": args.epochs, "temperature": args.temperature, "alpha": args.alpha},
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
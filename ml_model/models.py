@@ -0,0 +1,81 @@
+"""Model architectures for the training scripts (selected with MODEL_ARCH).
+
+baseline: the original CNN. Flatten turns the 17x17x128 feature map into 36992
+          inputs for Dense(512), so that one layer holds ~19M of the ~19.1M
+          parameters (the 228MB .h5 the app downloads).
+compact:  depthwise-separable convolutions and global average pooling, so no
+          layer scales with the spatial size of the feature map. About 47k
+          parameters, a file well under 1MB and several times faster per image
+          on CPU.
+tiny:     the distillation student (see distill.py), in the spirit of
+          create_tiny_model.py but with global pooling: ~3.6k parameters.
+
+All take 150x150x3 images in [0, 1] and output one sigmoid (0=B, 1=N).
+"""
+from tensorflow.keras.layers import (Conv2D, Dense, Dropout, Flatten, GlobalAveragePooling2D, MaxPooling2D,
+                                     SeparableConv2D)
+from tensorflow.keras.models import Sequential
+
+ARCHITECTURES = ('baseline', 'compact', 'tiny')
+
+
+def build_baseline(logits=False):
+    return Sequential([
+        Conv2D(32, (3, 3), activation='relu', input_shape=(150, 150, 3)),
+        MaxPooling2D(2, 2),
+        Conv2D(64, (3, 3), activation='relu'),
+        MaxPooling2D(2, 2),
+        Conv2D(128, (3, 3), activation='relu'),
+        MaxPooling2D(2, 2),
+        Flatten(),
+        Dropout(0.5),
+        Dense(512, activation='relu'),
+        Dense(1, activation=None if logits else 'sigmoid')
+    ], name='baseline')
+
+
+def build_compact(logits=False):
+    return Sequential([
+        # A strided full conv first: depthwise convs gain little on 3 input channels
+        Conv2D(32, (3, 3), strides=2, padding='same', activation='relu', input_shape=(150, 150, 3)),
+        SeparableConv2D(64, (3, 3), padding='same', activation='relu'),
+        MaxPooling2D(2, 2),
+        SeparableConv2D(128, (3, 3), padding='same', activation='relu'),
+        MaxPooling2D(2, 2),
+        SeparableConv2D(256, (3, 3), padding='same', activation='relu'),
+        GlobalAveragePooling2D(),
+        Dropout(0.3),
+        Dense(1, activation=None if logits else 'sigmoid')
+    ], name='compact')
+
+
+def build_tiny(logits=False):
+    return Sequential([
+        Conv2D(16, (3, 3), strides=2, padding='same', activation='relu', input_shape=(150, 150, 3)),
+        MaxPooling2D(2, 2),
+        SeparableConv2D(32, (3, 3), padding='same', activation='relu'),
+        MaxPooling2D(2, 2),
+        SeparableConv2D(64, (3, 3), padding='same', activation='relu'),
+        GlobalAveragePooling2D(),
+        Dense(1, activation=None if logits else 'sigmoid')
+    ], name='tiny')
+
+
+def build_model(arch='baseline', logits=False):
+    """Uncompiled model for the given architecture name.
+
+    logits=True leaves the final Dense linear (for distillation); the weights are
+    interchangeable with the sigmoid version.
+    """
+    if arch == 'baseline':
+        return build_baseline(logits)
+    if arch == 'compact':
+        return build_compact(logits)
+    if arch == 'tiny':
+        return build_tiny(logits)
+    raise ValueError(f"Unknown MODEL_ARCH {arch!r}, expected one of {', '.join(ARCHITECTURES)}")
+
+
+def model_filename(arch='baseline'):
+    """Where the training scripts save each architecture (baseline keeps the original name)."""
+    return 'waste_classifier_model.h5' if arch == 'baseline' else f'waste_classifier_model_{arch}.h5'
@@ -1,9 +1,9 @@
 import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 import os
 
+from models import build_model, model_filename
+
 # Use the dataset path you already have
 dataset_path = r'C:\Users\kisho\.cache\kagglehub\datasets\rayhanzamzamy\non-and-biodegradable-waste-dataset\versions\2'
 train_dir = os.path.join(dataset_path, 'TRAIN.1')
@@ -18,54 +18,58 @@ if not os.path.exists(train_dir):
     exit()
 
 # Image preprocessing with data augmentation
-train_datagen = ImageDataGenerator(
-    rescale=1./255,
-    rotation_range=20,
-    width_shift_range=0.2,
-    height_shift_range=0.2,
-    horizontal_flip=True,
-    zoom_range=0.2,
-    validation_split=0.2  # Use 20% for validation
-)
+# INPUT_PIPELINE=tfdata (default) decodes in parallel, caches the decoded images on disk under
+# DATA_CACHE_DIR (GBs for the full dataset, kept out of RAM) and prefetches (see data_pipeline.py);
+# INPUT_PIPELINE=shards streams pre-decoded shards from build_shards.py (SHARD_DIR);
+# INPUT_PIPELINE=generator keeps the old ImageDataGenerator path
+INPUT_PIPELINE = os.environ.get('INPUT_PIPELINE', 'tfdata')
 
-# Load training data
-train_generator = train_datagen.flow_from_directory(
-    train_dir,
-    target_size=(150, 150),
-    batch_size=32,
-    class_mode='binary',  # Binary classification
-    subset='training'
-)
+if INPUT_PIPELINE == 'tfdata':
+    from data_pipeline import make_dataset
+    train_data = make_dataset(train_dir, batch_size=32, validation_split=0.2, subset='training', augment=True)
+    validation_data = make_dataset(train_dir, batch_size=32, validation_split=0.2, subset='validation', shuffle=False)
+elif INPUT_PIPELINE == 'shards':
+    from data_pipeline import make_shard_dataset
+    shard_dir = os.environ.get('SHARD_DIR', 'shards/train')
+    train_data = make_shard_dataset(shard_dir, batch_size=32, validation_split=0.2, subset='training', augment=True)
+    validation_data = make_shard_dataset(shard_dir, batch_size=32, validation_split=0.2, subset='validation', shuffle=False)
+else:
+    train_datagen = ImageDataGenerator(
+        rescale=1./255,
+        rotation_range=20,
+        width_shift_range=0.2,
+        height_shift_range=0.2,
+        horizontal_flip=True,
+        zoom_range=0.2,
+        validation_split=0.2  # Use 20% for validation
+    )
 
-# Load validation data
-validation_generator = train_datagen.flow_from_directory(
-    train_dir,
-    target_size=(150, 150),
-    batch_size=32,
-    class_mode='binary',
-    subset='validation'
-)
+    # Load training data
+    train_data = train_datagen.flow_from_directory(
+        train_dir,
+        target_size=(150, 150),
+        batch_size=32,
+        class_mode='binary',  # Binary classification
+        subset='training'
+    )
+
+    # Load validation data
+    validation_data = train_datagen.flow_from_directory(
+        train_dir,
+        target_size=(150, 150),
+        batch_size=32,
+        class_mode='binary',
+        subset='validation'
+    )
 
-print(f"Training samples: {train_generator.samples}")
-print(f"Validation samples: {validation_generator.samples}")
-print(f"Class indices: {train_generator.class_indices}")
+print(f"Training samples: {train_data.samples}")
+print(f"Validation samples: {validation_data.samples}")
+print(f"Class indices: {train_data.class_indices}")
 
 # Build a simple but effective CNN model
-model = Sequential([
-    Conv2D(32, (3, 3), activation='relu', input_shape=(150, 150, 3)),
-    MaxPooling2D(2, 2),
-    
-    Conv2D(64, (3, 3), activation='relu'),
-    MaxPooling2D(2, 2),
-    
-    Conv2D(128, (3, 3), activation='relu'),
-    MaxPooling2D(2, 2),
-    
-    Flatten(),
-    Dropout(0.5),
-    Dense(512, activation='relu'),
-    Dense(1, activation='sigmoid')  # Binary output
-])
+# MODEL_ARCH=compact trains the depthwise-separable / global-pooling variant (see models.py)
+MODEL_ARCH = os.environ.get('MODEL_ARCH', 'baseline')
+model = build_model(MODEL_ARCH)
 
 # Compile model
 model.compile(
@@ -79,18 +83,24 @@ model.summary()
 
 # Train model
 print("Starting training...")
+fit_steps = {}
+if INPUT_PIPELINE not in ('tfdata', 'shards'):
+    # The generators loop forever, so Keras has to be told where an epoch ends
+    fit_steps = dict(
+        steps_per_epoch=train_data.samples // train_data.batch_size,
+        validation_steps=validation_data.samples // validation_data.batch_size,
+    )
 history = model.fit(
-    train_generator,
-    steps_per_epoch=train_generator.samples // train_generator.batch_size,
+    train_data,
     epochs=15,
-    validation_data=validation_generator,
-    validation_steps=validation_generator.samples // validation_generator.batch_size,
-    verbose=1
+    validation_data=validation_data,
+    verbose=1,
+    **fit_steps
 )
 
 # Save model
-model.save('waste_classifier_model.h5')
-print("Model saved as waste_classifier_model.h5")
+model.save(model_filename(MODEL_ARCH))
+print(f"Model saved as {model_filename(MODEL_ARCH)}")
 
 # Test the model with a few predictions
 import numpy as np
@@ -0,0 +1,204 @@
+"""Magnitude-prune the Keras waste classifier and export small artifacts at several sparsity levels.
+
+    python prune_model.py --data-dir <kaggle dataset>/TRAIN.1 --sparsity 0.5,0.75,0.9
+
+For each target sparsity the original model is fine-tuned with MagnitudePruning:
+the smallest-magnitude kernel weights of every Conv/Dense layer are zeroed on a
+schedule that ramps from 0 to the target over the first part of training, and
+kept at zero afterwards. Each result is written twice:
+
+  - <name>_pruned_<s>.h5: a normal Keras file (zeros are stored densely, so it is
+    no smaller on disk but gzips well in transfer; convert_model.py accepts it)
+  - <name>_pruned_<s>.npz: weight-clustered (16 shared values per kernel by default)
+    and deflate-compressed, see backend/compressed_model.py. Serve it with
+    MODEL_PATH=... in backend/app.py.
+
+The report gives validation accuracy, measured sparsity, file sizes (raw and
+gzipped) and load time for the original and every level.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, os.path.join(ROOT, 'ml_model'))
+from compressed_model import load_compressed_model, save_compressed_model  # noqa: E402
+from data_pipeline import make_dataset  # noqa: E402
+
+PRUNABLE_LAYERS = (tf.keras.layers.Conv2D, tf.keras.layers.Dense)
+
+
+class MagnitudePruning(tf.keras.callbacks.Callback):
+    """Zero the smallest-magnitude kernel weights during training.
+
+    Sparsity follows the cubic schedule of the TF Model Optimization toolkit:
+    it rises from 0 at begin_step to target_sparsity at end_step and masks are
+    recomputed every `frequency` steps. Masks are re-applied after every batch so
+    the optimizer cannot revive pruned weights. The output layer is left alone.
+    """
+
+    def __init__(self, target_sparsity, end_step, begin_step=0, frequency=20):
+        super().__init__()
+        self.target_sparsity = target_sparsity
+        self.begin_step = begin_step
+        self.end_step = max(end_step, begin_step + 1)
+        self.frequency = frequency
+        self.step = 0
+        self.masks = {}
+
+    def prunable_kernels(self):
+        layers = [l for l in self.model.layers if isinstance(l, PRUNABLE_LAYERS)]
+        # SeparableConv2D subclasses Conv2D; its depthwise_kernel and pointwise_kernel are pruned too
+        kernels = []
+        for layer in layers[:-1]:
+            for name in ('kernel', 'depthwise_kernel', 'pointwise_kernel'):
+                variable = getattr(layer, name, None)
+                if variable is not None:
+                    kernels.append(variable)
+        return kernels
+
+    def current_sparsity(self):
+        if self.step < self.begin_step:
+            return 0.0
+        progress = min(1.0, (self.step - self.begin_step) / (self.end_step - self.begin_step))
+        return self.target_sparsity * (1 - (1 - progress) ** 3)
+
+    def _update_masks(self):
+        sparsity = self.current_sparsity()
+        for variable in self.prunable_kernels():
+            weights = np.abs(variable.numpy())
+            k = int(sparsity * weights.size)
+            if k == 0:
+                self.masks[variable.path] = np.ones_like(weights, dtype=np.float32)
+                continue
+            threshold = np.partition(weights.reshape(-1), k - 1)[k - 1]
+            self.masks[variable.path] = (weights > threshold).astype(np.float32)
+
+    def apply_masks(self):
+        for variable in self.prunable_kernels():
+            mask = self.masks.get(variable.path)
+            if mask is not None:
+                variable.assign(variable.numpy() * mask)
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.step <= self.end_step and (self.step - self.begin_step) % self.frequency == 0:
+            self._update_masks()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.step += 1
+        self.apply_masks()
+
+    def on_train_end(self, logs=None):
+        # Land exactly on the target regardless of where the last update fell
+        self.step = max(self.step, self.end_step)
+        self._update_masks()
+        self.apply_masks()
+
+
+def kernel_sparsity(model):
+    kernels = [w for w in model.get_weights() if w.ndim > 1]
+    total = sum(w.size for w in kernels)
+    return round(sum(int(np.sum(w == 0)) for w in kernels) / total, 4)
+
+
+def gzipped_size(path):
+    with open(path, 'rb') as f:
+        return len(gzip.compress(f.read(), compresslevel=6))
+
+
+def timed_load(loader, path, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        loader(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        tf.keras.backend.clear_session()
+    return round(best, 3)
+
+
+def evaluate(model, validation):
+    correct = total = 0
+    for images, labels in validation:
+        preds = model.predict(images, verbose=0).reshape(-1) >= 0.5
+        correct += int(np.sum(preds == (labels.numpy() >= 0.5)))
+        total += len(preds)
+    return round(correct / total, 4)
+
+
+def describe(path, loader, model, validation):
+    return {
+        "file": os.path.basename(path),
+        "size_mb": round(os.path.getsize(path) / (1024 * 1024), 2),
+        "gzip_mb": round(gzipped_size(path) / (1024 * 1024), 2),
+        "load_seconds": timed_load(loader, path),
+        "accuracy": evaluate(model, validation),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='ml_model/waste_classifier_model.h5')
+    parser.add_argument('--data-dir', required=True, help='folder with B/ and N/ images (e.g. TRAIN.1)')
+    parser.add_argument('--sparsity', default='0.5,0.75,0.9', help='comma-separated target sparsities')
+    parser.add_argument('--epochs', type=int, default=3, help='fine-tuning epochs per sparsity level')
+    parser.add_argument('--learning-rate', type=float, default=1e-4)
+    parser.add_argument('--clusters', type=int, default=16, help='shared values per kernel in the .npz (0 = off)')
+    parser.add_argument('--out-dir', default='ml_model')
+    parser.add_argument('--report', help='also write the report as JSON to this path')
+    args = parser.parse_args()
+
+    train = make_dataset(args.data_dir, validation_split=0.2, subset='training', augment=True)
+    validation = make_dataset(args.data_dir, validation_split=0.2, subset='validation', shuffle=False)
+    steps_per_epoch = -(-train.samples // 32)
+    name = os.path.splitext(os.path.basename(args.model))[0]
+
+    original = load_model(args.model)
+    levels = [{"sparsity_target": 0.0, "sparsity": kernel_sparsity(original),
+               "h5": describe(args.model, load_model, original, validation)}]
+    print(f"original: {levels[0]['h5']}")
+
+    for target in [float(s) for s in args.sparsity.split(',')]:
+        tf.keras.backend.clear_session()
+        model = load_model(args.model, compile=False)
+        model.compile(optimizer=tf.keras.optimizers.Adam(args.learning_rate), loss='binary_crossentropy',
+                      metrics=['accuracy'])
+        total_steps = steps_per_epoch * args.epochs
+        # Reach the target after ~70% of the steps and recover accuracy in the rest
+        pruning = MagnitudePruning(target, end_step=int(total_steps * 0.7))
+        print(f"Pruning to {target:.0%} sparsity over {total_steps} steps")
+        model.fit(train, epochs=args.epochs, callbacks=[pruning], verbose=2)
+
+        h5_path = os.path.join(args.out_dir, f"{name}_pruned_{int(target * 100)}.h5")
+        npz_path = os.path.join(args.out_dir, f"{name}_pruned_{int(target * 100)}.npz")
+        model.save(h5_path, include_optimizer=False)
+        save_compressed_model(model, npz_path, clusters=args.clusters)
+        # Accuracy of the .npz is measured on the decoded (clustered) weights, i.e. what gets served
+        compressed = load_compressed_model(npz_path)
+        level = {
+            "sparsity_target": target,
+            "sparsity": kernel_sparsity(model),
+            "h5": describe(h5_path, load_model, model, validation),
+            "npz": describe(npz_path, load_compressed_model, compressed, validation),
+        }
+        levels.append(level)
+        print(f"{target:.0%}: sparsity {level['sparsity']}, h5 {level['h5']}, npz {level['npz']}")
+
+    report = {"model": args.model, "clusters": args.clusters, "epochs": args.epochs,
+              "validation_images": validation.samples, "levels": levels}
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()